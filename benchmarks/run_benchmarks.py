@@ -0,0 +1,180 @@
+# benchmarks/run_benchmarks.py
+# 热点路径基准测试，无需显示器；在项目根目录运行：
+#   python -m benchmarks.run_benchmarks --sizes 1000,10000 --output bench.json [--baseline base.json]
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.synthetic import (FakeScreenshotProvider, make_basic_workbook, make_step_workbook,
+                                  sample_annotations)
+from core.capture_backends import ReplayBackend
+from utils.annotations import render_annotations, to_records
+from utils.excel_handler import ExcelHandler
+from utils.metrics import tracer
+from utils.word_generator import WordGenerator
+
+
+class NullLogger:
+    def log(self, msg, level="INFO"):
+        pass
+
+    def debug(self, msg):
+        pass
+
+
+def measure(fn, repeat=3, setup=None):
+    """
+    重复执行 fn，返回 {"median", "min"}（秒）；setup 在每次计时前执行，不计入耗时
+    """
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return {"median": statistics.median(samples), "min": min(samples)}
+
+
+def bench_excel(results, workdir, sizes, repeat):
+    logger = NullLogger()
+    for version, make in (("basic", make_basic_workbook), ("step", make_step_workbook)):
+        for rows in sizes:
+            path = make(os.path.join(workdir, f"{version}_{rows}.xlsx"), rows)
+            handler = ExcelHandler(logger, workdir, None)
+            handler.file_path = path
+            results[f"load_excel.{version}.{rows}"] = measure(handler.load_excel, repeat)
+
+            def pending():
+                handler._case_index = None  # 每次都重新建立索引
+                return list(handler.get_pending_cases())
+            results[f"get_pending_cases.{version}.{rows}"] = measure(pending, repeat)
+
+            if version == "step":
+                def step_cases():
+                    handler._case_index = None
+                    return handler.get_step_cases()
+                results[f"get_step_cases.{rows}"] = measure(step_cases, repeat)
+
+            # 单次标记（缓冲，不写盘）与强制写回一次工作簿
+            handler.flush_every = float("inf")
+            handler.flush_interval = float("inf")
+            results[f"mark_case_executed.{version}.{rows}"] = measure(lambda: handler.mark_case_executed(0), repeat)
+            results[f"flush_status.{version}.{rows}"] = measure(
+                handler.flush_status, repeat, setup=lambda: handler.mark_case_executed(0))
+
+
+def bench_word(results, workdir, resolution, images, repeat):
+    provider = FakeScreenshotProvider(*resolution)
+    shots = [provider.grab() for _ in range(4)]
+    annotations = sample_annotations(*resolution)
+
+    # 文档逐渐变大时每次插图 + 保存的耗时（输出和暂存目录都在临时工作目录中）
+    output_dir = os.path.join(workdir, "word_output")
+    generator = WordGenerator(NullLogger(), None, output_dir=output_dir,
+                              staging_dir=os.path.join(workdir, "docx_staging"))
+    timings = []
+    for i in range(images):
+        start = time.perf_counter()
+        generator.add_image_to_word("bench", "验证点", shots[i % len(shots)], f"步骤{i + 1}", annotations)
+        generator.flush("bench")
+        timings.append(time.perf_counter() - start)
+    quarter = max(1, images // 4)
+    results[f"add_image_to_word.first{quarter}"] = {"median": statistics.median(timings[:quarter]),
+                                                     "min": min(timings[:quarter])}
+    results[f"add_image_to_word.last{quarter}"] = {"median": statistics.median(timings[-quarter:]),
+                                                    "min": min(timings[-quarter:])}
+
+    # Annotator.on_save 需要 Tk 窗口，无法在无显示器环境中运行：分别测量其中的无界面部分（画布图形转为记录）
+    # 和标注在导出时绘制到图片上的耗时（render_annotations）
+    shapes = [("circle", shape["box"], None) if shape["type"] == "circle"
+              else ("text", (*shape["pos"], shape["text"]), None) for shape in annotations]
+    results["annotator.to_records"] = measure(lambda: to_records(shapes), repeat)
+    results["annotator.render"] = measure(lambda: render_annotations(shots[0], annotations), repeat)
+
+    # 回放后端：从目录读取截图的耗时（与真实截图后端走同一接口）
+    replay_dir = os.path.join(workdir, "replay")
+    os.makedirs(replay_dir, exist_ok=True)
+    for i, shot in enumerate(shots):
+        shot.save(os.path.join(replay_dir, f"{i:03d}.png"), compress_level=1)
+    backend = ReplayBackend(replay_dir)
+    results["capture.replay"] = measure(backend.grab, repeat)
+
+
+def compare(results, baseline, threshold):
+    """
+    与基线比较中位数，返回超过阈值的退化项 [(名称, 基线, 当前, 比例)]
+    """
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("median"):
+            continue
+        ratio = current["median"] / base["median"]
+        if ratio > 1 + threshold:
+            regressions.append((name, base["median"], current["median"], ratio))
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="screenshot-to-word 热点路径基准测试")
+    parser.add_argument("--sizes", default="1000,10000", help="工作簿行数，逗号分隔（1k-200k）")
+    parser.add_argument("--resolution", default="1920x1080", help="模拟截图分辨率，如 3840x2160")
+    parser.add_argument("--images", type=int, default=40, help="单个文档累计插入的图片数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项重复次数")
+    parser.add_argument("--output", default="bench_output.json", help="结果 JSON 路径")
+    parser.add_argument("--baseline", help="基线结果 JSON，用于检测退化")
+    parser.add_argument("--threshold", type=float, default=0.2, help="中位数超出基线该比例视为退化")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    resolution = tuple(int(v) for v in args.resolution.lower().split("x"))
+
+    # 基准测试不写阶段耗时文件
+    tracer.enabled = False
+    workdir = tempfile.mkdtemp(prefix="s2w_bench_")
+    results = {}
+    try:
+        bench_excel(results, workdir, sizes, args.repeat)
+        bench_word(results, workdir, resolution, args.images, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "sizes": sizes, "resolution": list(resolution), "images": args.images,
+                 "time": time.strftime("%Y-%m-%d %H:%M:%S")},
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+    width = max(len(name) for name in results)
+    for name, value in results.items():
+        print(f"{name:<{width}}  {value['median'] * 1000:10.1f} ms")
+    print(f"结果已写入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        for name, base, current, ratio in regressions:
+            print(f"退化：{name} {base * 1000:.1f} ms -> {current * 1000:.1f} ms（{ratio:.2f}x）")
+        if regressions:
+            return 1
+        print("与基线相比无退化")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
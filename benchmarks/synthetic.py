@@ -0,0 +1,83 @@
+# benchmarks/synthetic.py
+
+import random
+from openpyxl import Workbook
+from PIL import Image, ImageDraw
+
+BASIC_HEADER = ['测试名称', '验证点', '测试结果']
+STEP_HEADER = ['测试名称', '验证点', '步骤名称', '步骤描述', '预期结果', '测试结果']
+
+
+def make_basic_workbook(path, rows, done_ratio=0.5, seed=0):
+    """
+    生成基础版工作簿：每行一条用例，done_ratio 比例的行已执行
+    """
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(BASIC_HEADER)
+    for i in range(rows):
+        ws.append([f"用例{i}", f"验证点{i}", "已执行" if rng.random() < done_ratio else None])
+    wb.save(path)
+    return path
+
+
+def make_step_workbook(path, rows, steps_per_case=10, done_ratio=0.5, seed=0):
+    """
+    生成步骤版工作簿：测试名称、验证点只写在每组首行（模拟合并单元格）
+    """
+    rng = random.Random(seed)
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(STEP_HEADER)
+    for i in range(rows):
+        case, step = divmod(i, steps_per_case)
+        first = step == 0
+        ws.append([
+            f"用例{case}" if first else None,
+            f"验证点{case}" if first else None,
+            f"步骤{step + 1}",
+            f"操作说明{step + 1}",
+            "结果正常",
+            "已执行" if rng.random() < done_ratio else None,
+        ])
+    wb.save(path)
+    return path
+
+
+class FakeScreenshotProvider:
+    """
+    模拟截图：按指定分辨率生成带窗口、文字块的界面图，无需显示器
+    """
+
+    def __init__(self, width=1920, height=1080, seed=0):
+        self.width = width
+        self.height = height
+        self._rng = random.Random(seed)
+
+    def grab(self):
+        rng = self._rng
+        img = Image.new("RGB", (self.width, self.height), (240, 240, 240))
+        draw = ImageDraw.Draw(img)
+        for _ in range(12):
+            x, y = rng.randrange(self.width - 200), rng.randrange(self.height - 150)
+            w, h = rng.randrange(200, self.width // 2), rng.randrange(150, self.height // 2)
+            color = tuple(rng.randrange(160, 255) for _ in range(3))
+            draw.rectangle([x, y, x + w, y + h], fill=color, outline=(90, 90, 90))
+            for line in range(y + 10, min(y + h, self.height) - 12, 18):
+                draw.text((x + 8, line), "Lorem ipsum dolor sit amet 12345", fill=(20, 20, 20))
+        return img
+
+
+def sample_annotations(width, height, count=6):
+    """
+    生成若干圈选和文字标注记录
+    """
+    shapes = []
+    for i in range(count):
+        x, y = width * (i + 1) // (count + 2), height * (i + 1) // (count + 2)
+        if i % 2:
+            shapes.append({"type": "text", "pos": [x, y], "text": f"标注{i}"})
+        else:
+            shapes.append({"type": "circle", "box": [x, y, x + 120, y + 80]})
+    return shapes
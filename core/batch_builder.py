@@ -0,0 +1,250 @@
+# core/batch_builder.py
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils import config
+from utils.annotations import load_sidecar
+from utils.excel_handler import ExcelHandler
+from utils.path_utils import get_base_path
+from utils.word_generator import WordGenerator
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+NAME_SEPARATOR = "__"
+
+
+def parse_image_name(filename):
+    """
+    解析图片文件名 <测试名称>__<验证点>[__<步骤序号>].<扩展名>，
+    返回 (测试名称, 验证点, 步骤序号或None)，不符合规则返回 None
+    """
+    stem, ext = os.path.splitext(filename)
+    if ext.lower() not in IMAGE_EXTENSIONS:
+        return None
+    parts = [part.strip() for part in stem.split(NAME_SEPARATOR)]
+    if len(parts) == 2:
+        return parts[0], parts[1], None
+    if len(parts) == 3 and parts[2].isdigit():
+        return parts[0], parts[1], int(parts[2])
+    return None
+
+
+class _BufferedLogger:
+    """
+    工作进程内使用：收集日志，随结果返回主进程统一输出
+    """
+
+    def __init__(self):
+        self.records = []
+
+    def log(self, msg, level="INFO"):
+        self.records.append((level, msg))
+
+    def debug(self, msg):
+        self.log(msg, "DEBUG")
+
+
+def build_case_document(output_dir, case_name, groups, overwrite):
+    """
+    生成单个用例的 Word 文档（可在工作进程中执行），包含图片解码、缩放和插入，
+    返回 (用例名, 行号列表, 图片数, 日志记录, 错误列表)
+    """
+    logger = _BufferedLogger()
+    word_generator = WordGenerator(logger, None, output_dir=output_dir)
+    doc_path = os.path.join(output_dir, f"{case_name}.docx")
+    if overwrite and os.path.exists(doc_path):
+        os.remove(doc_path)
+
+    rows, image_count = [], 0
+    for checkpoint, entries in groups:
+        for row, note, path, annotations in entries:
+            if annotations is None:
+                annotations = load_sidecar(path)
+            word_generator.add_image_to_word(case_name, checkpoint, path, note, annotations)
+            rows.append(row)
+            image_count += 1
+    word_generator.flush(case_name)
+
+    errors = [msg for level, msg in logger.records if level == "ERROR"]
+    return case_name, rows, image_count, logger.records, errors
+
+
+def generate_documents(logger, output_dir, by_case, overwrite=False, workers=1, on_case_done=None,
+                       on_progress=None):
+    """
+    按 {用例名: [(验证点, [(行号, 步骤说明, 图片路径, 标注记录或None), ...]), ...]} 生成文档，
+    标注记录为 None 时读取图片旁的标注文件；workers 大于 1 时多进程并行；
+    每个用例成功后调用 on_case_done(用例名)，每个用例结束（无论成败）后调用 on_progress(已完成数, 总数)，
+    返回 (行号列表, 图片数, 失败用例列表)
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    rows, failed = [], []
+    image_count = 0
+    finished = 0
+
+    def report_progress():
+        nonlocal finished
+        finished += 1
+        if on_progress:
+            on_progress(finished, len(by_case))
+
+    def collect_result(result):
+        nonlocal image_count
+        case_name, case_rows, case_images, records, errors = result
+        for level, msg in records:
+            logger.log(msg, level)
+        if errors:
+            # 文档生成出错的用例不回写状态
+            failed.append(case_name)
+            return
+        rows.extend(case_rows)
+        image_count += case_images
+        if on_case_done:
+            on_case_done(case_name)
+
+    if workers > 1 and len(by_case) > 1:
+        logger.log(f"批量生成：使用 {workers} 个进程并行生成 {len(by_case)} 个文档")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(build_case_document, output_dir, case_name, groups, overwrite): case_name
+                       for case_name, groups in by_case.items()}
+            for future in as_completed(futures):
+                try:
+                    collect_result(future.result())
+                except Exception as e:
+                    failed.append(futures[future])
+                    logger.log(f"生成文档失败：{futures[future]}：{e}", "ERROR")
+                report_progress()
+    else:
+        for case_name, groups in by_case.items():
+            try:
+                collect_result(build_case_document(output_dir, case_name, groups, overwrite))
+            except Exception as e:
+                failed.append(case_name)
+                logger.log(f"生成文档失败：{case_name}：{e}", "ERROR")
+            report_progress()
+    return rows, image_count, failed
+
+
+def build_from_manifest(logger, manifest, output_dir, workers=1, rebuild=False, on_progress=None):
+    """
+    按运行清单一次性生成报告：默认追加到已有文档并跳过已生成的用例；
+    rebuild 为 True 时删除清单涉及的文档后完整重建；on_progress(已完成数, 总数) 报告生成进度。
+    返回 (成功用例的行号列表, 失败用例列表)
+    """
+    shots = manifest.shots()
+    built = set() if rebuild else manifest.built_cases()
+    by_case = {}
+    for shot in shots:
+        if shot["case"] in built:
+            continue
+        groups = by_case.setdefault(shot["case"], [])
+        if not groups or groups[-1][0] != shot["checkpoint"]:
+            groups.append((shot["checkpoint"], []))
+        groups[-1][1].append((shot["row"], shot["step_note"], shot["image"], shot.get("annotations")))
+
+    if built:
+        logger.log(f"运行清单中 {len(built)} 个用例文档已生成，跳过")
+    _, image_count, failed = generate_documents(logger, output_dir, by_case, overwrite=rebuild, workers=workers,
+                                                on_case_done=manifest.mark_case_built, on_progress=on_progress)
+    if not failed:
+        manifest.mark_built()
+    logger.log(f"按运行清单生成报告：{len(by_case) - len(failed)} 个文档，{image_count} 张图片，失败 {len(failed)} 个")
+    return [shot["row"] for shot in shots if shot["case"] not in failed], failed
+
+
+class BatchReportBuilder:
+    """
+    无界面批量生成报告：按用例分组将已有截图匹配到 Excel 行，
+    一次性生成 word_output 下的全部 Word 文档，并一次写回执行状态；
+    各用例文档相互独立，workers 大于 1 时分配到多个进程并行生成
+    """
+
+    def __init__(self, logger, excel_path, image_dir, output_dir=None, overwrite=False, workers=None):
+        self.logger = logger
+        self.excel_path = excel_path
+        self.image_dir = image_dir
+        self.overwrite = overwrite
+        workers = workers if workers is not None else config.BATCH_WORKERS
+        self.workers = workers or os.cpu_count() or 1
+        # 批量模式下状态只在最后统一写回
+        self.excel_handler = ExcelHandler(logger, os.path.dirname(excel_path), None,
+                                          flush_every=float("inf"), flush_interval=float("inf"))
+        self.excel_handler.file_path = excel_path
+        self.output_dir = output_dir or os.path.join(get_base_path(), "word_output")
+
+    def _scan_images(self):
+        images = {}
+        for filename in sorted(os.listdir(self.image_dir)):
+            parsed = parse_image_name(filename)
+            if parsed is None:
+                continue
+            case_name, checkpoint, step = parsed
+            images.setdefault((case_name, checkpoint), []).append((step or 0, os.path.join(self.image_dir, filename)))
+        return images
+
+    def collect(self):
+        """
+        按工作簿中用例顺序返回插图任务列表 [(测试名称, 验证点, [(行号, 步骤说明, 图片路径, None), ...]), ...]
+        """
+        images = self._scan_images()
+        index = self.excel_handler.case_index
+        step_mode = self.excel_handler.version == "步骤版"
+        jobs = []
+
+        if step_mode:
+            for group, key in enumerate(index.group_keys):
+                shots = images.pop(key, None)
+                if not shots:
+                    continue
+                rows = index.group_rows(group)
+                entries = []
+                for step, path in sorted(shots):
+                    if not 1 <= step <= len(rows):
+                        self.logger.log(f"图片步骤序号超出范围，已忽略：{os.path.basename(path)}", "WARNING")
+                        continue
+                    pos = rows[step - 1]
+                    note = f"{index.step_fields['步骤名称'][pos]} - {index.step_fields['步骤描述'][pos]}"
+                    entries.append((int(index.row_labels[pos]), note, path, None))
+                if entries:
+                    jobs.append((key[0], key[1], entries))
+        else:
+            for pos in range(index.size):
+                key = (index.raw_names[pos], index.raw_checkpoints[pos])
+                shots = images.pop(key, None)
+                if shots:
+                    row = int(index.row_labels[pos])
+                    jobs.append((key[0], key[1], [(row, "", path, None) for _, path in sorted(shots)]))
+
+        for (case_name, checkpoint), shots in images.items():
+            for _, path in shots:
+                self.logger.log(f"未匹配到用例，已忽略：{os.path.basename(path)}", "WARNING")
+        return jobs
+
+    def build(self):
+        """
+        执行批量生成，返回统计信息 {"documents", "failed", "images", "rows", "seconds"}
+        """
+        start = time.perf_counter()
+        if not self.excel_handler.load_excel():
+            raise RuntimeError(f"加载 Excel 文件失败：{self.excel_path}")
+        jobs = self.collect()
+        self.logger.log(f"批量生成：匹配到 {len(jobs)} 组用例")
+
+        # 同名用例写入同一文档，按用例名汇总后每个文档作为一个独立任务
+        by_case = {}
+        for case_name, checkpoint, entries in jobs:
+            by_case.setdefault(case_name, []).append((checkpoint, entries))
+
+        rows, image_count, failed = generate_documents(self.logger, self.output_dir, by_case,
+                                                       self.overwrite, self.workers)
+
+        # 全部结果汇总后一次写回 Excel
+        self.excel_handler.mark_cases_executed(sorted(set(rows)))
+        if not self.excel_handler.flush_status():
+            raise RuntimeError(f"写回 Excel 状态失败：{self.excel_path}")
+
+        summary = {"documents": len(by_case) - len(failed), "failed": len(failed), "images": image_count,
+                   "rows": len(set(rows)), "seconds": round(time.perf_counter() - start, 2)}
+        self.logger.log(f"批量生成完成：{summary['documents']} 个文档（失败 {summary['failed']} 个），"
+                        f"{summary['images']} 张图片，更新 {summary['rows']} 行状态，耗时 {summary['seconds']} 秒")
+        return summary
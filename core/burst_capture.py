@@ -0,0 +1,132 @@
+# core/burst_capture.py
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from utils import config
+from utils.image_hash import hamming, is_similar
+
+# 审阅列表中显示的缩略图尺寸
+THUMBNAIL_SIZE = (360, 240)
+
+
+class BurstShot:
+    """
+    连拍队列中的一张截图：暂定归属为截图时的用例（步骤），审阅时可补充标注、修改归属或丢弃；
+    原图存入截图存储后只在内存中保留缩略图，审阅和写入时再从存储读取
+    """
+
+    def __init__(self, image, image_hash, image_key, path_future, target):
+        self.image = image
+        self.image_hash = image_hash
+        self.image_key = image_key
+        self.path_future = path_future
+        # (行号, 测试名称, 验证点, 步骤序号, 步骤说明)，基础版步骤序号为 None
+        self.target = target
+        self.captured_at = time.strftime("%H:%M:%S")
+        self.size = image.size
+        self.thumbnail = image.copy()
+        self.thumbnail.thumbnail(THUMBNAIL_SIZE)
+        self.annotations = []
+        self.discarded = False
+        self.duplicate = False
+        if path_future is not None:
+            path_future.add_done_callback(self._on_archived)
+
+    def _on_archived(self, future):
+        # 已写入存储：释放内存中的原图
+        if future.exception() is None:
+            self.image = None
+
+    def load_image(self):
+        """
+        返回原图：仍在内存中时直接返回，否则从截图存储读取
+        """
+        image = self.image
+        if image is not None:
+            return image
+        with Image.open(self.path_future.result()) as src:
+            src.load()
+            return src.copy()
+
+
+class BurstCapture:
+    """
+    连拍：每次只截图并加入有界队列，标注和写入留到批量审阅；截图在单个后台线程中串行执行，
+    上一张未完成或队列已满时直接拒绝（背压），不会出现重叠的截图流程
+    """
+
+    def __init__(self, screenshot_tool, logger, max_pending=None, before_grab=None):
+        self.screenshot_tool = screenshot_tool
+        self.logger = logger
+        self.max_pending = max_pending if max_pending is not None else config.BURST_QUEUE_SIZE
+        self.before_grab = before_grab  # 截图前在后台线程中调用（如隐藏控制面板）
+        self._shots = []
+        self._lock = threading.Lock()
+        self._capturing = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="burst-capture")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._shots)
+
+    def pending(self):
+        """
+        队列中尚未写入的截图（按截图顺序）
+        """
+        with self._lock:
+            return list(self._shots)
+
+    def remove(self, shots):
+        with self._lock:
+            done = {id(shot) for shot in shots}
+            self._shots = [shot for shot in self._shots if id(shot) not in done]
+
+    def trigger(self, target, on_done=None):
+        """
+        请求截图一张并暂定归入 target：正在截图或队列已满时返回拒绝原因，否则返回 None；
+        截图在后台线程完成后回调 on_done(shot)，失败时 shot 为 None
+        """
+        with self._lock:
+            if self._capturing:
+                return "上一张截图尚未完成"
+            if len(self._shots) >= self.max_pending:
+                return f"连拍队列已满（{self.max_pending} 张），请先批量审阅"
+            self._capturing = True
+        self._executor.submit(self._capture, target, on_done)
+        return None
+
+    def _capture(self, target, on_done):
+        shot = None
+        try:
+            if self.before_grab:
+                self.before_grab()
+            img = self.screenshot_tool.grab()
+            if img is not None:
+                image_hash = self.screenshot_tool.last_hash
+                shot_name = f"{target[1]}_{time.strftime('%Y%m%d_%H%M%S')}"
+                image_key = f"{shot_name}#{image_hash:016x}" if image_hash is not None else None
+                path_future = self.screenshot_tool.archive(img) if config.ARCHIVE_CAPTURES else None
+                shot = BurstShot(img, image_hash, image_key, path_future, target)
+                with self._lock:
+                    previous = self._shots[-1] if self._shots else None
+                    if previous and previous.target[1] == target[1] and is_similar(
+                            image_hash, previous.image_hash, config.DUPLICATE_THRESHOLD):
+                        shot.duplicate = True
+                        self.logger.log(f"连拍重复截图：与上一张几乎相同"
+                                        f"（汉明距离 {hamming(image_hash, previous.image_hash)}）", "WARNING")
+                    self._shots.append(shot)
+                    count = len(self._shots)
+                self.logger.log(f"连拍截图入队：{shot_name}，队列 {count} / {self.max_pending}")
+        except Exception as e:
+            self.logger.log(f"连拍截图失败：{e}", "ERROR")
+            shot = None
+        finally:
+            with self._lock:
+                self._capturing = False
+        if on_done:
+            on_done(shot)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
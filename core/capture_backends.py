@@ -0,0 +1,146 @@
+# core/capture_backends.py
+
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from utils import config
+from utils.metrics import tracer
+
+REPLAY_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".webp")
+
+
+class CaptureBackend:
+    """
+    截图后端基类：子类实现 _grab() 返回 PIL 图片，grab() 统一计时并记录最近一次耗时
+    """
+
+    name = "base"
+
+    def __init__(self):
+        self.last_latency = None
+
+    def grab(self):
+        start = time.perf_counter()
+        img = self._grab()
+        self.last_latency = time.perf_counter() - start
+        tracer.record("capture", self.last_latency, backend=self.name)
+        return img
+
+    def _grab(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MssBackend(CaptureBackend):
+    """
+    进程内快速截图：Linux 下走 X11 共享内存（XShm），Windows 下走 GDI，无需启动外部进程；
+    monitor 为 mss 的显示器序号：1 为主显示器（与 pyautogui 在 Windows 上的全屏截图一致），
+    0 为全部显示器拼成的整块虚拟屏幕；未指定时取 config.CAPTURE_MONITOR。
+    mss 实例不能跨线程使用，所有截图都在一个专用线程中执行并复用同一实例，close() 时释放
+    """
+
+    name = "mss"
+
+    def __init__(self, monitor=None):
+        super().__init__()
+        import mss  # 可选依赖，未安装时由 create_backend 降级
+        self._mss = mss
+        self.monitor = monitor if monitor is not None else config.CAPTURE_MONITOR
+        self._sct = None  # 只在截图线程中创建和使用
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mss-capture")
+
+    def _grab(self):
+        return self._executor.submit(self._grab_in_thread).result()
+
+    def _grab_in_thread(self):
+        if self._sct is None:
+            self._sct = self._mss.mss()
+        # 指定的显示器不存在（如拔掉了副屏）时退回主显示器
+        monitors = self._sct.monitors
+        shot = self._sct.grab(monitors[self.monitor] if self.monitor < len(monitors) else monitors[1])
+        return Image.frombuffer("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+    def _close_in_thread(self):
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+    def close(self):
+        """
+        在截图线程中关闭 mss 实例（释放 GDI / X 句柄）并停止该线程
+        """
+        try:
+            self._executor.submit(self._close_in_thread).result()
+        except RuntimeError:
+            # 已关闭
+            pass
+        self._executor.shutdown(wait=False)
+
+
+class PyAutoGuiBackend(CaptureBackend):
+    """
+    原有截图方式：pyautogui.screenshot()（Linux 下依赖外部截图程序，较慢）
+    """
+
+    name = "pyautogui"
+
+    def __init__(self):
+        super().__init__()
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def _grab(self):
+        return self._pyautogui.screenshot()
+
+
+class ReplayBackend(CaptureBackend):
+    """
+    回放截图：按文件名顺序依次返回目录中的图片，用于无显示器的测试与基准测试；
+    loop 为 False 时取完后抛出 StopIteration
+    """
+
+    name = "replay"
+
+    def __init__(self, directory, loop=True):
+        super().__init__()
+        if not directory or not os.path.isdir(directory):
+            raise ValueError(f"回放目录不存在：{directory}")
+        self.files = [os.path.join(directory, filename) for filename in sorted(os.listdir(directory))
+                      if filename.lower().endswith(REPLAY_EXTENSIONS)]
+        if not self.files:
+            raise ValueError(f"回放目录中没有图片：{directory}")
+        self._files = itertools.cycle(self.files) if loop else iter(self.files)
+        self._lock = threading.Lock()
+
+    def _grab(self):
+        with self._lock:
+            path = next(self._files)
+        with Image.open(path) as src:
+            return src.convert("RGB")
+
+
+def create_backend(name=None, logger=None, replay_dir=None):
+    """
+    按名称创建截图后端（auto / mss / pyautogui / replay），未指定取 config 默认值；
+    auto 优先使用 mss，不可用时降级为 pyautogui
+    """
+    name = (name or config.CAPTURE_BACKEND).lower()
+    if name == "replay":
+        return ReplayBackend(replay_dir or config.CAPTURE_REPLAY_DIR)
+    if name == "pyautogui":
+        return PyAutoGuiBackend()
+    if name == "mss":
+        return MssBackend()
+    if name != "auto":
+        raise ValueError(f"不支持的截图后端：{name}")
+    try:
+        return MssBackend()
+    except ImportError:
+        if logger:
+            logger.log("未安装 mss，截图后端降级为 pyautogui", "WARNING")
+        return PyAutoGuiBackend()
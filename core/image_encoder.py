@@ -0,0 +1,63 @@
+# core/image_encoder.py
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils import config
+from utils.metrics import tracer
+
+FORMAT_EXTENSIONS = {"png": ".png", "jpeg": ".jpg", "webp": ".webp"}
+
+
+def save_options(fmt=None, png_compress_level=None, jpeg_quality=None, webp_method=None):
+    """
+    返回 (PIL格式名, 保存参数)，未指定的参数取 config 默认值
+    """
+    fmt = (fmt or config.CAPTURE_FORMAT).lower()
+    if fmt == "png":
+        level = png_compress_level if png_compress_level is not None else config.PNG_COMPRESS_LEVEL
+        return "PNG", {"compress_level": level}
+    if fmt in ("jpeg", "jpg"):
+        quality = jpeg_quality if jpeg_quality is not None else config.JPEG_QUALITY
+        return "JPEG", {"quality": quality, "optimize": True}
+    if fmt == "webp":
+        method = webp_method if webp_method is not None else config.WEBP_METHOD
+        return "WEBP", {"lossless": True, "method": method}
+    raise ValueError(f"不支持的图片格式：{fmt}")
+
+
+class ImageEncoder:
+    """
+    后台截图编码池：截图后立即返回，编码与写盘在线程池中完成
+    """
+
+    def __init__(self, logger, fmt=None, png_compress_level=None, jpeg_quality=None, webp_method=None,
+                 max_workers=None):
+        self.logger = logger
+        self.fmt = (fmt or config.CAPTURE_FORMAT).lower()
+        if self.fmt == "jpg":
+            self.fmt = "jpeg"
+        self.pil_format, self.params = save_options(self.fmt, png_compress_level, jpeg_quality, webp_method)
+        self.extension = FORMAT_EXTENSIONS[self.fmt]
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or config.ENCODER_WORKERS,
+                                            thread_name_prefix="image-encoder")
+
+    def submit_store(self, image, store):
+        """
+        提交存入截图存储的任务（摘要计算与编码都在后台线程），返回 Future，结果为存储中的图片路径
+        """
+        return self._executor.submit(store.put, image, self)
+
+    def encode(self, image, filepath):
+        start = time.perf_counter()
+        if self.pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        image.save(filepath, self.pil_format, **self.params)
+        elapsed = (time.perf_counter() - start) * 1000
+        tracer.record("encode", elapsed / 1000, format=self.fmt)
+        size_kb = os.path.getsize(filepath) / 1024
+        self.logger.log(f"编码截图：{filepath}，格式 {self.fmt}，耗时 {elapsed:.0f} ms，大小 {size_kb:.0f} KB")
+        return filepath
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
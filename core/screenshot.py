@@ -1,56 +1,113 @@
 # core/screenshot.py
 
-import os
 import time
-import pyautogui
-import threading
+from concurrent.futures import Future
 from ui.annotator import Annotator
-import tkinter as tk
-from utils.path_utils import get_base_path
+from core.capture_backends import create_backend
+from core.image_encoder import ImageEncoder
+from utils.image_hash import dhash
+from utils.image_store import ImageStore
+from utils.metrics import tracer
+from utils.tk_dispatch import MainThreadDispatcher
 
 
 class ScreenshotTool:
-    def __init__(self, logger, root):
+    def __init__(self, logger, root, encoder=None, dispatcher=None, backend=None, store=None):
         self.logger = logger
         self.root = root
-        base_dir = get_base_path()
-        self.temp_dir = os.path.join(base_dir, "Temp")
-        os.makedirs(self.temp_dir, exist_ok=True)
+        self.encoder = encoder or ImageEncoder(logger)
+        self.store = store or ImageStore(logger)
+        self.dispatcher = dispatcher or MainThreadDispatcher.for_root(root)
+        self.backend = backend or create_backend(logger=logger)
+        self.logger.log(f"截图后端：{self.backend.name}")
+        # 延迟测量：最近一次截图完成、标注保存的时间点（perf_counter）
+        self.captured_at = None
+        self.annotated_at = None
+        # 最近一次截图的感知哈希，用于检测重复截图
+        self.last_hash = None
 
-    def capture_screen(self, filename):
+    def grab(self):
         """
-        全屏截图，保存到Temp目录，返回图片路径
+        全屏截图，返回内存中的图片对象，失败返回 None
         """
         try:
-            filepath = os.path.join(self.temp_dir, filename)
-            img = pyautogui.screenshot()
-            img.save(filepath)
-            self.logger.log(f"截图保存：{filepath}")
-            return filepath
+            img = self.backend.grab()
+            self.captured_at = time.perf_counter()
+            self.logger.log(f"截图完成（{self.backend.name}）：{img.width}x{img.height}，"
+                            f"耗时 {self.backend.last_latency * 1000:.0f} ms")
+            with tracer.span("hash"):
+                self.last_hash = dhash(img)
+            return img
         except Exception as e:
             self.logger.log(f"截图失败：{e}")
             return None
 
-    def annotate(self, image_path):
-        result = {'done': False, 'annotator': None}
+    def close(self):
+        """
+        释放截图后端持有的资源（控制面板结束时调用）
+        """
+        self.backend.close()
+
+    def archive(self, image):
+        """
+        后台将截图存入按内容寻址的截图存储，返回 Future，结果为存储中的图片路径
+        """
+        return self.encoder.submit_store(image, self.store)
 
-        def run_annotator():
-            annotator = Annotator(self.root, image_path)
+    def save_annotations(self, path_future, size, annotations):
+        """
+        截图存入存储后，在存储中的图片旁写入标注 JSON（按图片摘要命名），便于之后重新编辑和导出
+        """
+        def write_sidecar(future):
+            try:
+                path = self.store.save_annotations(future.result(), size, annotations)
+                self.logger.log(f"保存标注记录：{path}")
+            except Exception as e:
+                self.logger.log(f"保存标注记录失败：{e}", "ERROR")
+
+        path_future.add_done_callback(write_sidecar)
+
+    def capture_screen(self):
+        """
+        全屏截图并提交后台存储，返回 (图片对象, Future)，Future 结果为存储中的图片路径
+        """
+        img = self.grab()
+        if img is None:
+            return None, None
+        return img, self.archive(img)
+
+    @tracer.timed("annotate")
+    def annotate(self, image, annotations=None):
+        """
+        在主线程中打开标注窗口，当前（后台）线程等待窗口关闭，
+        返回标注记录列表（原图坐标），取消标注返回 None
+        """
+        done = Future()
+        captured_at = self.captured_at
+
+        def on_done(annotator):
+            self.annotated_at = time.perf_counter()
+            done.set_result(annotator)
+
+        def on_visible(event):
+            if event.widget is event.widget.winfo_toplevel() and captured_at is not None:
+                event.widget.unbind("<Map>")
+                self.logger.log(f"截图到标注窗口可见：{(time.perf_counter() - captured_at) * 1000:.0f} ms")
+
+        def open_annotator():
+            annotator = Annotator(self.root, image=image, annotations=annotations, on_done=on_done)
+            annotator.bind("<Map>", on_visible)
             annotator.grab_set()
-            annotator.wait_window()
-            result['annotator'] = annotator
-            result['done'] = True
-
-        thread = threading.Thread(target=run_annotator)
-        thread.start()
-        while not result['done']:
-            self.root.update()
-            time.sleep(0.05)
-
-        annotator = result.get('annotator')
-        if annotator and not getattr(annotator, 'save_result', True):
+
+        try:
+            self.dispatcher.call(open_annotator).result()
+        except Exception as e:
+            self.logger.log(f"打开标注窗口失败：{e}")
+            return None
+        annotator = done.result()
+        if not annotator.save_result:
             self.logger.log("用户选择不保存标注，返回 None")
             return None
 
-        self.logger.log(f"标注完成：{image_path}")
-        return image_path
\ No newline at end of file
+        self.logger.log(f"标注完成，共 {len(annotator.annotations)} 处标注")
+        return annotator.annotations
@@ -1,6 +1,13 @@
-import threading
+import os
 from tkinter import messagebox
+from core.batch_builder import build_from_manifest
+from core.workbook_queue import WorkbookQueue
 from ui.control_panel import ControlPanel
+from utils import config
+from utils.path_utils import get_base_path
+from utils.progress_journal import ProgressJournal
+from utils.run_manifest import RunManifest
+from utils.word_generator import count_pictures
 
 class TestRunner:
     def __init__(self, logger, excel_handler, root):
@@ -21,61 +28,154 @@ class TestRunner:
                 self.logger.log("加载 Excel 文件失败")
                 return
 
-            if self.excel_handler.version == "步骤版":
-                self.pending_cases = list(self.excel_handler.get_pending_cases())
-                if not self.pending_cases:
-                    self.root.attributes('-topmost', True)
-                    messagebox.showinfo("提示", "所有用例均已执行，无需重复执行。", parent=self.root)
-                    self.root.attributes('-topmost', False)
-                    self.logger.log("无待执行步骤用例，测试结束")
+            self._run_workbook()
+        except Exception as e:
+            self.logger.log(f"测试运行异常：{e}")
+            self.root.attributes('-topmost', True)
+            messagebox.showerror("错误", f"测试运行异常：{e}", parent=self.root)
+            self.root.attributes('-topmost', False)
+
+    def run_queue(self, paths):
+        """
+        队列模式：依次执行多个工作簿，执行当前工作簿时后台预备下一个；中途退出控制面板则停止队列
+        """
+        queue = WorkbookQueue(self.logger, paths, self.root)
+        self.logger.log(f"队列执行开始：共 {len(queue)} 个工作簿")
+        completed = 0
+        try:
+            for position, prepared in enumerate(queue, 1):
+                name = os.path.basename(prepared.path)
+                if not prepared.ok:
+                    self.logger.log(f"队列第 {position} 个工作簿加载失败，已跳过：{name}", "ERROR")
+                    continue
+                self.logger.log(f"队列第 {position} / {len(queue)} 个工作簿：{name}")
+                self.excel_handler = prepared.excel_handler
+                if not self._run_workbook(prepared, quiet=True):
+                    self.logger.log("控制面板已退出，队列执行停止")
                     return
+                completed += 1
+            self.root.attributes('-topmost', True)
+            messagebox.showinfo("完成", f"队列执行完毕：{completed} / {len(queue)} 个工作簿", parent=self.root)
+            self.root.attributes('-topmost', False)
+        except Exception as e:
+            self.logger.log(f"队列执行异常：{e}")
+            self.root.attributes('-topmost', True)
+            messagebox.showerror("错误", f"队列执行异常：{e}", parent=self.root)
+            self.root.attributes('-topmost', False)
+        finally:
+            queue.close()
 
-                pending_keys = {(case_name, checkpoint) for _, case_name, checkpoint in self.pending_cases}
-                all_step_cases = self.excel_handler.get_step_cases()
-                filtered_cases = {k: v for k, v in all_step_cases.items() if k in pending_keys}
-
-                self.logger.log(f"步骤版待执行用例组数：{len(filtered_cases)}")
-                self.control_panel = ControlPanel(self.logger, filtered_cases, self.excel_handler, self.root, is_step_mode=True)
-                self.root.withdraw()
-                self.control_panel.deiconify()
-                self.control_panel.grab_set()
-                # 等待control_panel窗口关闭后再判断保存结果
-                self.control_panel.wait_window()
-                # 修改: 通过control_panel获取annotator对象
-                if hasattr(self.control_panel, 'annotator'):
-                    annotator = self.control_panel.annotator
-                    if not getattr(annotator, "save_result", False):
-                        self.logger.log("用户选择不保存标注，跳过当前步骤/用例。")
-                        self.root.deiconify()
-                        return
-                return
+    def _show_nothing_pending(self, quiet):
+        if quiet:
+            return
+        self.root.attributes('-topmost', True)
+        messagebox.showinfo("提示", "所有用例均已执行，无需重复执行。", parent=self.root)
+        self.root.attributes('-topmost', False)
 
-            self.pending_cases = list(self.excel_handler.get_pending_cases())
-            if not self.pending_cases:
-                self.root.attributes('-topmost', True)
-                messagebox.showinfo("提示", "所有用例均已执行，无需重复执行。", parent=self.root)
-                self.root.attributes('-topmost', False)
-                self.logger.log("无待执行用例，测试结束")
-                return
+    def _run_workbook(self, prepared=None, quiet=False):
+        """
+        执行已加载的工作簿（self.excel_handler），prepared 为后台预备结果；
+        返回 False 表示控制面板中途退出，True 表示执行完毕或无需执行
+        """
+        if self.recover_runs():
+            # 补生成报告后状态和文档已变化，预备结果作废
+            prepared = None
 
-            self.logger.log(f"共加载 {len(self.pending_cases)} 条待执行用例")
-            self.root.withdraw()
+        if self.excel_handler.version == "步骤版":
+            filtered_cases = prepared.step_cases if prepared else self.excel_handler.get_step_cases(pending_only=True)
+            if not filtered_cases:
+                self._show_nothing_pending(quiet)
+                self.logger.log("无待执行步骤用例，测试结束")
+                return True
+
+            progress_dir = os.path.join(get_base_path(), config.PROGRESS_DIR)
+            progress_journal = ProgressJournal.for_workbook(progress_dir, self.excel_handler.file_path)
+            resume_steps = self.resume_points(progress_journal, filtered_cases, prepared)
+            # 进度日志中已全部完成的用例组不再进入控制面板
+            filtered_cases = {key: steps for key, steps in filtered_cases.items()
+                              if resume_steps.get(key, 0) < len(steps)}
+            if not filtered_cases:
+                progress_journal.clear()
+                self._show_nothing_pending(quiet)
+                self.logger.log("进度日志中步骤均已完成，测试结束")
+                return True
 
-            self.control_panel = ControlPanel(self.logger, self.pending_cases, self.excel_handler, self.root)
+            self.logger.log(f"步骤版待执行用例组数：{len(filtered_cases)}")
+            self.control_panel = ControlPanel(self.logger, filtered_cases, self.excel_handler, self.root,
+                                              is_step_mode=True, resume_steps=resume_steps,
+                                              progress_journal=progress_journal)
+            self.root.withdraw()
             self.control_panel.deiconify()
             self.control_panel.grab_set()
             # 等待control_panel窗口关闭后再判断保存结果
             self.control_panel.wait_window()
-
+            # 修改: 通过control_panel获取annotator对象
             if hasattr(self.control_panel, 'annotator'):
                 annotator = self.control_panel.annotator
-                # 当save_result为False或None时，跳过当前截图处理，直接返回控制面板
-                if not getattr(annotator, "save_result", True):
+                if not getattr(annotator, "save_result", False):
                     self.logger.log("用户选择不保存标注，跳过当前步骤/用例。")
                     self.root.deiconify()
-                    return
-        except Exception as e:
-            self.logger.log(f"测试运行异常：{e}")
-            self.root.attributes('-topmost', True)
-            messagebox.showerror("错误", f"测试运行异常：{e}", parent=self.root)
-            self.root.attributes('-topmost', False)
\ No newline at end of file
+            return self.control_panel.finished
+
+        self.pending_cases = prepared.pending_cases if prepared else list(self.excel_handler.get_pending_cases())
+        if not self.pending_cases:
+            self._show_nothing_pending(quiet)
+            self.logger.log("无待执行用例，测试结束")
+            return True
+
+        self.logger.log(f"共加载 {len(self.pending_cases)} 条待执行用例")
+        self.root.withdraw()
+
+        self.control_panel = ControlPanel(self.logger, self.pending_cases, self.excel_handler, self.root)
+        self.control_panel.deiconify()
+        self.control_panel.grab_set()
+        # 等待control_panel窗口关闭后再判断保存结果
+        self.control_panel.wait_window()
+
+        if hasattr(self.control_panel, 'annotator'):
+            annotator = self.control_panel.annotator
+            # 当save_result为False或None时，跳过当前截图处理，直接返回控制面板
+            if not getattr(annotator, "save_result", True):
+                self.logger.log("用户选择不保存标注，跳过当前步骤/用例。")
+                self.root.deiconify()
+        return self.control_panel.finished
+
+    def resume_points(self, progress_journal, step_cases, prepared=None):
+        """
+        计算各步骤用例组的续跑步骤序号 {(测试名称, 验证点): 步骤序号}：开头连续的、有进度记录（核对文档中实际图片数）
+        或在工作簿中已执行的步骤视为已完成；进度日志中已截图的行同时回写为已执行；
+        prepared 为后台预备结果，复用其中统计好的文档图片数
+        """
+        output_dir = os.path.join(get_base_path(), "word_output")
+        index = self.excel_handler.case_index
+        resume_steps, rows = {}, []
+        for key, steps in step_cases.items():
+            executed = {position for position, step in enumerate(steps)
+                        if index.done[index.position(step["index"])]}
+            doc_pictures = None
+            if progress_journal.has(*key):
+                doc_path = os.path.join(output_dir, f"{key[0]}.docx")
+                doc_pictures = prepared.pictures(doc_path) if prepared else count_pictures(doc_path)
+            step, done_rows = progress_journal.resume(*key, doc_pictures, executed)
+            rows.extend(done_rows)
+            if step:
+                resume_steps[key] = step
+                self.logger.log(f"用例 {key[0]} - {key[1]} 已完成 {step} 步，将从第 {step + 1} 步继续")
+        if rows:
+            self.excel_handler.mark_cases_executed(sorted(set(rows)))
+            self.excel_handler.flush_status()
+        return resume_steps
+
+    def recover_runs(self):
+        """
+        上次运行异常退出、报告未生成时，按遗留的运行清单补生成报告并回写状态，返回补生成的清单数
+        """
+        manifest_dir = os.path.join(get_base_path(), config.MANIFEST_DIR)
+        output_dir = os.path.join(get_base_path(), "word_output")
+        manifests = RunManifest.unfinished(manifest_dir, self.excel_handler.file_path)
+        for manifest in manifests:
+            self.logger.log(f"检测到未完成的运行清单，补生成报告：{manifest.path}")
+            rows, failed = build_from_manifest(self.logger, manifest, output_dir)
+            self.excel_handler.mark_cases_executed(sorted(set(rows)))
+        self.excel_handler.flush_status()
+        return len(manifests)
@@ -0,0 +1,101 @@
+# core/workbook_queue.py
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from utils.excel_handler import ExcelHandler
+from utils.path_utils import get_base_path
+from utils.word_generator import count_pictures
+
+
+class PreparedWorkbook:
+    """
+    预先加载好的工作簿：ExcelHandler（已加载并建好用例索引）、待执行用例和已有 Word 文档的图片数
+    """
+
+    def __init__(self, path, excel_handler=None, pending_cases=None, step_cases=None, doc_pictures=None):
+        self.path = path
+        self.excel_handler = excel_handler
+        self.pending_cases = pending_cases or []
+        self.step_cases = step_cases or {}
+        self.doc_pictures = doc_pictures or {}
+
+    @property
+    def ok(self):
+        return self.excel_handler is not None
+
+    def pictures(self, doc_path):
+        """
+        文档中的图片数：预备后文档未被修改时直接使用预备结果，否则重新统计
+        """
+        mtime = os.path.getmtime(doc_path) if os.path.exists(doc_path) else None
+        cached = self.doc_pictures.get(doc_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        return count_pictures(doc_path)
+
+
+class WorkbookQueue:
+    """
+    工作簿队列：按顺序逐个执行，迭代时返回当前工作簿，同时在后台线程预备下一个
+    （加载、建立待执行用例索引、统计已有 Word 文档），切换工作簿时无需等待
+    """
+
+    def __init__(self, logger, paths, root=None, output_dir=None):
+        self.logger = logger
+        self.paths = list(paths)
+        self.root = root
+        self.output_dir = output_dir or os.path.join(get_base_path(), "word_output")
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="workbook-prepare")
+
+    @staticmethod
+    def discover(input_dir):
+        """
+        返回目录下全部 Excel 工作簿（按文件名排序，忽略 Office 临时文件）
+        """
+        return [os.path.join(input_dir, filename) for filename in sorted(os.listdir(input_dir))
+                if filename.lower().endswith(".xlsx") and not filename.startswith("~$")]
+
+    def _prepare(self, path):
+        start = time.perf_counter()
+        # 后台预备时不弹窗，错误只写日志；轮到该工作簿时再绑定界面
+        excel_handler = ExcelHandler(self.logger, os.path.dirname(path), None)
+        excel_handler.file_path = path
+        if not excel_handler.load_excel():
+            return PreparedWorkbook(path)
+
+        if excel_handler.version == "步骤版":
+            step_cases = excel_handler.get_step_cases(pending_only=True)
+            pending_cases, case_names = [], {key[0] for key in step_cases}
+        else:
+            step_cases = {}
+            pending_cases = list(excel_handler.get_pending_cases())
+            case_names = {filename for _, filename, _ in pending_cases}
+
+        doc_pictures = {}
+        for case_name in case_names:
+            doc_path = os.path.join(self.output_dir, f"{case_name}.docx")
+            if os.path.exists(doc_path):
+                doc_pictures[doc_path] = (os.path.getmtime(doc_path), count_pictures(doc_path))
+        excel_handler.root = self.root
+        self.logger.log(f"已预备工作簿：{os.path.basename(path)}，待执行 {len(step_cases) or len(pending_cases)} 项，"
+                        f"耗时 {(time.perf_counter() - start) * 1000:.0f} ms")
+        return PreparedWorkbook(path, excel_handler, pending_cases, step_cases, doc_pictures)
+
+    def __len__(self):
+        return len(self.paths)
+
+    def __iter__(self):
+        future = self._executor.submit(self._prepare, self.paths[0]) if self.paths else None
+        for position in range(len(self.paths)):
+            try:
+                prepared = future.result()
+            except Exception as e:
+                self.logger.log(f"预备工作簿失败：{os.path.basename(self.paths[position])}：{e}", "ERROR")
+                prepared = PreparedWorkbook(self.paths[position])
+            if position + 1 < len(self.paths):
+                future = self._executor.submit(self._prepare, self.paths[position + 1])
+            yield prepared
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,22 +1,45 @@
+import time
+_ENTRY_START = time.perf_counter()
+
+import argparse
+import importlib
+import multiprocessing
+import sys
 import threading
 import tkinter as tk
-import webbrowser
 from utils.path_utils import get_base_path, ensure_directories
 from utils.logger import Logger
-from utils.excel_handler import ExcelHandler
-from core.test_runner import TestRunner
+
+_ENTRY_IMPORTED = time.perf_counter()
 
 APP_TITLE = "测试工具 作者: DingHao"
+# 主窗口显示后在后台预热的重量级模块，按依赖顺序导入并分别计时（含尚未导入的依赖）
+WARM_UP_MODULES = ("PIL.Image", "numpy", "pandas", "openpyxl", "docx", "utils.excel_handler",
+                   "core.test_runner")
+
+
+def import_timed(names, timings):
+    """
+    依次导入模块，将每个模块的耗时（秒，失败为 None）写入 timings
+    """
+    for name in names:
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+            timings[name] = time.perf_counter() - start
+        except Exception:
+            timings[name] = None
+
 
 class DesktopTestToolApp:
-    def __init__(self):
+    def __init__(self, profile_startup=False):
         import os
         self.base_path = get_base_path()
         os.chdir(self.base_path)  # 设置工作目录为exe同级路径，确保所有相对路径正确
 
         self.root = tk.Tk()
         self.root.title(APP_TITLE)
-        self.root.geometry("450x400")
+        self.root.geometry("520x400")
         self.root.resizable(True, True)
 
         self.logger = Logger(self.root)
@@ -26,10 +49,17 @@ class DesktopTestToolApp:
         except Exception as e:
             self.logger.log(f"初始化目录异常：{e}")
 
-        self.excel_handler = ExcelHandler(self.logger, input_dir=self.base_path + "/excel_input", root=self.root)
-        self.test_runner = TestRunner(self.logger, self.excel_handler, self.root)
+        # Excel / Word / 截图相关模块较重，主窗口显示后在后台预热，点击“开始执行”时才创建
+        self.excel_handler = None
+        self.test_runner = None
+        self.profile_startup = profile_startup
+        self.import_timings = {}
+        self.first_window_at = None
+        self.warm_up_seconds = None
+        self._warm_up_done = threading.Event()
 
         self.create_main_ui()
+        self.root.bind("<Map>", self._on_first_map)
         self.logger.log("程序启动，界面加载完成")
 
     def create_main_ui(self):
@@ -40,6 +70,9 @@ class DesktopTestToolApp:
         start_btn = tk.Button(btn_frame, text="开始执行", width=15, command=self.on_start)
         start_btn.pack(side="left", padx=10)
 
+        queue_btn = tk.Button(btn_frame, text="队列执行", width=15, command=self.on_queue)
+        queue_btn.pack(side="left", padx=10)
+
         exit_btn = tk.Button(btn_frame, text="退出", width=15, command=self.on_exit)
         exit_btn.pack(side="left", padx=10)
         
@@ -47,20 +80,211 @@ class DesktopTestToolApp:
 
         link = tk.Label(self.root, text="GitHub", fg="blue", cursor="hand2", font=("Arial", 10))
         link.pack(pady=0)
-        link.bind("<Button-1>", lambda e: webbrowser.open_new("https://github.com/DavisDing/screenshot-to-word"))
+        link.bind("<Button-1>", lambda e: self.open_homepage())
+
+    def open_homepage(self):
+        import webbrowser
+        webbrowser.open_new("https://github.com/DavisDing/screenshot-to-word")
+
+    def _on_first_map(self, event):
+        if event.widget is not self.root:
+            return
+        self.root.unbind("<Map>")
+        self.first_window_at = time.perf_counter()
+        self.logger.log(f"主窗口可见：启动后 {(self.first_window_at - _ENTRY_START) * 1000:.0f} ms")
+        threading.Thread(target=self._warm_up, name="warm-up", daemon=True).start()
+        if self.profile_startup:
+            self.root.after(50, self._report_startup)
+
+    def _warm_up(self):
+        start = time.perf_counter()
+        import_timed(WARM_UP_MODULES, self.import_timings)
+        self.warm_up_seconds = time.perf_counter() - start
+        failed = [name for name, seconds in self.import_timings.items() if seconds is None]
+        if failed:
+            self.logger.log(f"后台预热失败的模块：{', '.join(failed)}", "WARNING")
+        self.logger.log(f"后台预热完成，耗时 {self.warm_up_seconds * 1000:.0f} ms")
+        self._warm_up_done.set()
+
+    def _report_startup(self):
+        # 启动分析模式：预热完成后输出各阶段耗时并退出
+        if not self._warm_up_done.is_set():
+            self.root.after(50, self._report_startup)
+            return
+        lines = [
+            "启动耗时分析：",
+            f"  入口模块导入        {(_ENTRY_IMPORTED - _ENTRY_START) * 1000:8.0f} ms",
+            f"  主窗口可见          {(self.first_window_at - _ENTRY_START) * 1000:8.0f} ms",
+            f"  后台预热（合计）    {self.warm_up_seconds * 1000:8.0f} ms",
+        ]
+        for name, seconds in self.import_timings.items():
+            lines.append(f"    {name:<20}{'导入失败' if seconds is None else f'{seconds * 1000:8.0f} ms'}")
+        for line in lines:
+            print(line)
+            self.logger.log(line)
+        self.root.quit()
+
+    def _ensure_runner(self):
+        if self.test_runner is None:
+            # 预热未完成时此处会等待对应模块导入完成
+            from utils.excel_handler import ExcelHandler
+            from core.test_runner import TestRunner
+            self.excel_handler = ExcelHandler(self.logger, input_dir=self.base_path + "/excel_input", root=self.root)
+            self.test_runner = TestRunner(self.logger, self.excel_handler, self.root)
+        return self.test_runner
+
     def on_start(self):
         self.logger.log("点击开始执行按钮")
-        thread = threading.Thread(target=self.test_runner.run_tests)
+        thread = threading.Thread(target=self._ensure_runner().run_tests)
+        thread.daemon = True
+        thread.start()
+
+    def on_queue(self):
+        import os
+        from tkinter import filedialog, messagebox
+        from core.workbook_queue import WorkbookQueue
+
+        self.logger.log("点击队列执行按钮")
+        input_dir = os.path.join(self.base_path, "excel_input")
+        choice = messagebox.askyesnocancel("队列执行", "依次执行 excel_input 下的全部工作簿？\n选择“否”可挑选部分工作簿。",
+                                           parent=self.root)
+        if choice is None:
+            return
+        if choice:
+            paths = WorkbookQueue.discover(input_dir)
+        else:
+            paths = list(filedialog.askopenfilenames(title="请选择要依次执行的 Excel 文件", initialdir=input_dir,
+                                                     filetypes=[("Excel 文件", "*.xlsx")], parent=self.root))
+        if not paths:
+            self.logger.log("队列执行：未选择工作簿")
+            return
+        thread = threading.Thread(target=self._ensure_runner().run_queue, args=(paths,))
         thread.daemon = True
         thread.start()
 
     def on_exit(self):
         self.logger.log("点击退出按钮，程序结束")
+        if self.test_runner is not None:
+            # 队列模式下当前工作簿由 TestRunner 切换
+            self.test_runner.excel_handler.flush_status()
         self.root.quit()
 
     def run(self):
         self.root.mainloop()
+        from utils.metrics import tracer
+        tracer.close()
+        self.logger.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=APP_TITLE)
+    parser.add_argument("--batch", metavar="EXCEL", help="无界面批量模式：指定 Excel 文件")
+    parser.add_argument("--images", metavar="DIR", help="批量模式：截图目录，文件名为 <测试名称>__<验证点>[__<步骤序号>].png")
+    parser.add_argument("--output", metavar="DIR", help="批量模式：Word 输出目录，默认 word_output")
+    parser.add_argument("--overwrite", action="store_true", help="批量模式：重新生成前删除已有的 Word 文档")
+    parser.add_argument("--workers", type=int, metavar="N", help="批量模式：并行进程数，0 为按 CPU 核数，1 为串行")
+    parser.add_argument("--replay", metavar="MANIFEST", help="按运行清单重新生成报告（配合 --overwrite 完整重建）")
+    parser.add_argument("--store-maintenance", action="store_true", help="统计截图存储占用（配合 --compact 整理）")
+    parser.add_argument("--compact", action="store_true", help="截图存储维护：清理孤立文件、按上限淘汰并删除旧版 Temp 截图")
+    parser.add_argument("--profile-startup", action="store_true", help="输出启动耗时（模块导入、主窗口可见、后台预热）后退出")
+    return parser.parse_args(argv)
+
+
+def run_batch(args):
+    from core.batch_builder import BatchReportBuilder
+    from utils.metrics import tracer
+
+    if not args.images:
+        print("批量模式需要同时指定 --images 截图目录")
+        return 2
+    logger = Logger(None)
+    try:
+        builder = BatchReportBuilder(logger, args.batch, args.images, output_dir=args.output,
+                                     overwrite=args.overwrite, workers=args.workers)
+        summary = builder.build()
+        print(f"完成：{summary['documents']} 个文档（失败 {summary['failed']} 个），{summary['images']} 张图片，"
+              f"更新 {summary['rows']} 行状态，耗时 {summary['seconds']} 秒")
+        return 1 if summary['failed'] else 0
+    except Exception as e:
+        logger.log(f"批量生成失败：{e}", "ERROR")
+        print(f"批量生成失败：{e}")
+        return 1
+    finally:
+        tracer.close()
+        logger.close()
+
+
+def run_replay(args):
+    import os
+    from core.batch_builder import build_from_manifest
+    from utils.excel_handler import ExcelHandler
+    from utils.metrics import tracer
+    from utils.run_manifest import RunManifest
+
+    logger = Logger(None)
+    try:
+        manifest = RunManifest(args.replay)
+        output_dir = args.output or os.path.join(get_base_path(), "word_output")
+        rows, failed = build_from_manifest(logger, manifest, output_dir, workers=args.workers or 1,
+                                           rebuild=args.overwrite)
+        workbook = manifest.workbook()
+        if workbook and os.path.exists(workbook):
+            excel_handler = ExcelHandler(logger, os.path.dirname(workbook), None)
+            excel_handler.file_path = workbook
+            if excel_handler.load_excel():
+                excel_handler.mark_cases_executed(sorted(set(rows)))
+                excel_handler.flush_status()
+        print(f"完成：回放 {len(set(rows))} 行截图记录，失败用例 {len(failed)} 个")
+        return 1 if failed else 0
+    except Exception as e:
+        logger.log(f"按运行清单生成失败：{e}", "ERROR")
+        print(f"按运行清单生成失败：{e}")
+        return 1
+    finally:
+        tracer.close()
+        logger.close()
+
+
+def run_store_maintenance(args):
+    import os
+    from utils import config
+    from utils.docx_stream import cleanup_staging, orphaned_staging
+    from utils.image_store import ImageStore
+
+    def mb(size):
+        return f"{size / 1024 / 1024:.1f} MB"
+
+    logger = Logger(None)
+    try:
+        store = ImageStore(logger)
+        legacy_dir = os.path.join(get_base_path(), "Temp")
+        stats = store.report(legacy_dir)
+        print(f"截图存储：{store.root_dir}")
+        print(f"  对象 {stats['objects']} 个，共 {mb(stats['bytes'])}（上限 {mb(stats['max_bytes'])}），"
+              f"未完成用例引用 {mb(stats['pinned_bytes'])}")
+        print(f"  孤立文件 {stats['orphans']} 个（{mb(stats['orphan_bytes'])}），索引中已丢失 {stats['missing']} 个")
+        print(f"  旧版 Temp 截图 {stats['legacy_files']} 个（{mb(stats['legacy_bytes'])}）")
+        staging_dir = os.path.join(get_base_path(), config.WORD_STAGING_DIR)
+        print(f"  遗留的 Word 暂存目录 {len(orphaned_staging(staging_dir))} 个")
+        if args.compact:
+            _, staging_freed = cleanup_staging(staging_dir, logger)
+            print(f"整理完成，释放 {mb(store.compact(legacy_dir) + staging_freed)}")
+        return 0
+    except Exception as e:
+        logger.log(f"截图存储维护失败：{e}", "ERROR")
+        print(f"截图存储维护失败：{e}")
+        return 1
+    finally:
+        logger.close()
+
 
 if __name__ == "__main__":
-    app = DesktopTestToolApp()
+    multiprocessing.freeze_support()  # 打包为 exe 后批量模式的工作进程需要
+    args = parse_args()
+    if args.batch:
+        sys.exit(run_batch(args))
+    if args.replay:
+        sys.exit(run_replay(args))
+    if args.store_maintenance:
+        sys.exit(run_store_maintenance(args))
+    app = DesktopTestToolApp(profile_startup=args.profile_startup)
     app.run()
\ No newline at end of file
@@ -0,0 +1,44 @@
+# tests/test_progress_journal.py
+# 运行：在项目根目录执行 python -m pytest tests
+
+from utils.progress_journal import ProgressJournal
+
+
+def test_resume_from_journal(tmp_path):
+    journal = ProgressJournal(str(tmp_path / "progress.jsonl"))
+    journal.record_step("A", "c", 0, 10, "a.png", 1)
+    journal.record_step("A", "c", 1, 11, skipped=True)
+    journal.record_step("A", "c", 2, 12, "c.png", 2)
+
+    assert ProgressJournal(journal.path).resume("A", "c", 2) == (3, [10, 12])
+
+
+def test_resume_cuts_off_unsaved_pictures(tmp_path):
+    journal = ProgressJournal(str(tmp_path / "progress.jsonl"))
+    journal.record_step("A", "c", 0, 10, "a.png", 1)
+    journal.record_step("A", "c", 1, 11, "b.png", 2)
+
+    # 文档只保存到第 1 张图片：第 2 步需要重做
+    assert journal.resume("A", "c", 1) == (1, [10])
+
+
+def test_resume_mid_group(tmp_path):
+    # 上次按工作簿状态从第 4 步续跑（前 3 步没有进度记录），第 4、5 步截图后异常退出
+    journal = ProgressJournal(str(tmp_path / "progress.jsonl"))
+    journal.record_step("A", "c", 3, 13, "d.png", 1)
+    journal.record_step("A", "c", 4, 14, "e.png", 2)
+    journal = ProgressJournal(journal.path)
+
+    assert journal.resume("A", "c", 2, executed={0, 1, 2}) == (5, [13, 14])
+    # 工作簿中的已执行状态不受图片数核对影响，只有进度记录会被截断
+    assert journal.resume("A", "c", 1, executed={0, 1, 2}) == (4, [13])
+    assert journal.resume("A", "c", 0, executed={0, 1, 2}) == (3, [])
+    # 工作簿状态也不连续时从第一个未完成的步骤开始
+    assert journal.resume("A", "c", 2, executed={0, 2}) == (1, [])
+
+
+def test_resume_without_journal_uses_workbook_status(tmp_path):
+    journal = ProgressJournal(str(tmp_path / "progress.jsonl"))
+
+    assert not journal.has("B", "c")
+    assert journal.resume("B", "c", None, executed={0, 1, 3}) == (2, [])
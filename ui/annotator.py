@@ -2,9 +2,9 @@
 
 import tkinter as tk
 from tkinter import simpledialog, messagebox
-from PIL import Image, ImageTk, ImageDraw, ImageFont
+from PIL import Image, ImageTk
 import sys
-import os
+from utils.annotations import to_records
 
 # 跨平台中文字体名
 if sys.platform.startswith("win"):
@@ -14,37 +14,69 @@ elif sys.platform.startswith("darwin"):
 else:
     default_font_name = "WenQuanYi Micro Hei"
 
+MIN_ZOOM = 0.1
+MAX_ZOOM = 4.0
+CANVAS_FONT_SIZE = 16
+
+
 class Annotator(tk.Toplevel):
-    def __init__(self, root, image_path):
+    def __init__(self, root, image, annotations=None, on_done=None):
         super().__init__(root)
         self.root = root
-        self.image_path = image_path
+        self.on_done = on_done  # 窗口关闭后回调 on_done(self)，由调用方读取 save_result / annotations
         self.title("截图标注")
         self.attributes("-topmost", True)
         self.protocol("WM_DELETE_WINDOW", self.on_close)
         self.resizable(True, True)
 
-        # 载入图片
-        self.original_image = Image.open(self.image_path).convert("RGBA")
-        self.draw_image = self.original_image.copy()
-        self.tk_image = ImageTk.PhotoImage(self.draw_image)
-
-        self.canvas = tk.Canvas(self, width=self.tk_image.width(), height=self.tk_image.height(), cursor="cross")
-        self.canvas.pack(fill="both", expand=True)
-
-        self.canvas_image = self.canvas.create_image(0, 0, anchor="nw", image=self.tk_image)
+        # 使用内存中的截图，只保留原图一份，显示用缩放预览
+        self.original_image = image
+        self.tk_image = None
+
+        # 视口：初始缩放到适合屏幕大小，标注坐标统一按原图坐标保存
+        screen_w, screen_h = self.winfo_screenwidth(), self.winfo_screenheight()
+        self.fit_zoom = min(1.0, screen_w * 0.9 / image.width, screen_h * 0.85 / image.height)
+        self.zoom = self.fit_zoom
+        view_w, view_h = round(image.width * self.zoom), round(image.height * self.zoom)
+
+        self.canvas = tk.Canvas(self, width=view_w, height=view_h, cursor="cross", highlightthickness=0)
+        h_scroll = tk.Scrollbar(self, orient="horizontal", command=self.canvas.xview)
+        v_scroll = tk.Scrollbar(self, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(xscrollcommand=h_scroll.set, yscrollcommand=v_scroll.set)
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        v_scroll.grid(row=0, column=1, sticky="ns")
+        h_scroll.grid(row=1, column=0, sticky="ew")
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(0, weight=1)
+
+        self.canvas_image = self.canvas.create_image(0, 0, anchor="nw")
+        self._render_preview()
 
         # 标注数据
-        self.shapes = []  # (type, data)，type: 'circle'/'text'
+        self.shapes = []  # (type, 原图坐标数据, 画布元素id)，type: 'circle'/'text'
         self.current_circle = None
         self.start_x = None
         self.start_y = None
+        self._pending_motion = None
 
         # 绑定事件
         self.canvas.bind("<ButtonPress-1>", self.on_left_button_down)
         self.canvas.bind("<B1-Motion>", self.on_left_button_move)
         self.canvas.bind("<ButtonRelease-1>", self.on_left_button_up)
         self.canvas.bind("<Button-3>", self.on_right_click)
+        # 平移：中键拖动或滚轮；缩放：Ctrl+滚轮 / Ctrl+加减号，Ctrl+0 适应屏幕
+        self.canvas.bind("<ButtonPress-2>", lambda e: self.canvas.scan_mark(e.x, e.y))
+        self.canvas.bind("<B2-Motion>", lambda e: self.canvas.scan_dragto(e.x, e.y, gain=1))
+        self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)
+        self.canvas.bind("<Control-MouseWheel>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-4>", self.on_mouse_wheel)
+        self.canvas.bind("<Button-5>", self.on_mouse_wheel)
+        self.canvas.bind("<Control-Button-4>", self.on_mouse_wheel)
+        self.canvas.bind("<Control-Button-5>", self.on_mouse_wheel)
+        self.bind("<Control-plus>", lambda e: self.set_zoom(self.zoom * 1.25))
+        self.bind("<Control-equal>", lambda e: self.set_zoom(self.zoom * 1.25))
+        self.bind("<Control-minus>", lambda e: self.set_zoom(self.zoom / 1.25))
+        self.bind("<Control-0>", lambda e: self.set_zoom(self.fit_zoom))
 
         self.bind("<Control-z>", self.on_undo)
         self.bind("<Control-Z>", self.on_undo)
@@ -52,32 +84,93 @@ class Annotator(tk.Toplevel):
         self.bind("<Control-S>", self.on_save)
         self.bind("<Escape>", self.on_escape)
 
+        # 重新编辑：绘制已有标注
+        for shape in annotations or []:
+            if shape["type"] == "circle":
+                data = list(shape["box"])
+            else:
+                data = (shape["pos"][0], shape["pos"][1], shape["text"])
+            self.shapes.append((shape["type"], data, self._draw_shape(shape["type"], data)))
+
         self.focus_set()
         self.save_result = False
+        self.annotations = None
+
+    def _render_preview(self):
+        # 按当前缩放生成显示用预览，原图分辨率数据不进入Tk
+        image = self.original_image
+        size = (max(1, round(image.width * self.zoom)), max(1, round(image.height * self.zoom)))
+        preview = image if size == image.size else image.resize(size, Image.BILINEAR, reducing_gap=2.0)
+        self.tk_image = ImageTk.PhotoImage(preview)
+        self.canvas.itemconfig(self.canvas_image, image=self.tk_image)
+        self.canvas.configure(scrollregion=(0, 0, size[0], size[1]))
+
+    def _to_image(self, event):
+        # 画布坐标（含滚动偏移）换算为原图坐标
+        return self.canvas.canvasx(event.x) / self.zoom, self.canvas.canvasy(event.y) / self.zoom
+
+    def _draw_shape(self, kind, data):
+        z = self.zoom
+        if kind == 'circle':
+            x1, y1, x2, y2 = data
+            return self.canvas.create_oval(x1 * z, y1 * z, x2 * z, y2 * z, outline="red", width=2)
+        x, y, text = data
+        font_size = max(6, round(CANVAS_FONT_SIZE * z))
+        return self.canvas.create_text(x * z, y * z, text=text, fill="blue", font=(default_font_name, font_size))
+
+    def set_zoom(self, zoom):
+        zoom = min(MAX_ZOOM, max(MIN_ZOOM, zoom))
+        if abs(zoom - self.zoom) < 1e-6:
+            return
+        self.zoom = zoom
+        self._render_preview()
+        for i, (kind, data, item) in enumerate(self.shapes):
+            self.canvas.delete(item)
+            self.shapes[i] = (kind, data, self._draw_shape(kind, data))
+
+    def on_mouse_wheel(self, event):
+        delta = event.delta if event.num not in (4, 5) else (120 if event.num == 4 else -120)
+        if event.state & 0x0004:  # Ctrl
+            self.set_zoom(self.zoom * (1.25 if delta > 0 else 0.8))
+        else:
+            self.canvas.yview_scroll(-1 if delta > 0 else 1, "units")
 
     def on_left_button_down(self, event):
-        self.start_x, self.start_y = event.x, event.y
+        self.start_x, self.start_y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
         self.current_circle = self.canvas.create_oval(self.start_x, self.start_y, self.start_x, self.start_y, outline="red", width=2)
 
     def on_left_button_move(self, event):
+        # 拖动事件合并：只记录最新位置，空闲时统一重绘一次
         if self.current_circle:
-            self.canvas.coords(self.current_circle, self.start_x, self.start_y, event.x, event.y)
+            if self._pending_motion is None:
+                self.after_idle(self._apply_motion)
+            self._pending_motion = (self.canvas.canvasx(event.x), self.canvas.canvasy(event.y))
+
+    def _apply_motion(self):
+        if self.current_circle and self._pending_motion:
+            self.canvas.coords(self.current_circle, self.start_x, self.start_y, *self._pending_motion)
+        self._pending_motion = None
 
     def on_left_button_up(self, event):
         if self.current_circle:
+            x, y = self.canvas.canvasx(event.x), self.canvas.canvasy(event.y)
+            self.canvas.coords(self.current_circle, self.start_x, self.start_y, x, y)
+            self._pending_motion = None
             coords = self.canvas.coords(self.current_circle)
             if abs(coords[2] - coords[0]) < 5 or abs(coords[3] - coords[1]) < 5:
                 # 太小，视为无效，删除
                 self.canvas.delete(self.current_circle)
             else:
-                self.shapes.append(('circle', coords, self.current_circle))
+                image_coords = [c / self.zoom for c in coords]
+                self.shapes.append(('circle', image_coords, self.current_circle))
             self.current_circle = None
 
     def on_right_click(self, event):
+        x, y = self._to_image(event)
         text = simpledialog.askstring("输入文本", "请输入标注文字：", parent=self)
         if text:
-            item = self.canvas.create_text(event.x, event.y, text=text, fill="blue", font=(default_font_name, 16))
-            self.shapes.append(('text', (event.x, event.y, text), item))
+            data = (x, y, text)
+            self.shapes.append(('text', data, self._draw_shape('text', data)))
 
     def on_undo(self, event=None):
         if not self.shapes:
@@ -86,34 +179,15 @@ class Annotator(tk.Toplevel):
         self.canvas.delete(last[2])
 
     def on_save(self, event=None):
-        # 生成最终图像，叠加标注
-        final_img = self.original_image.copy()
-        draw = ImageDraw.Draw(final_img)
-
-        # 跨平台加载支持中文的字体，优先使用常见系统字体，否则降级为默认字体
-        try:
-            if sys.platform.startswith("win"):
-                font_path = os.path.join("C:\\Windows\\Fonts", "msyh.ttc")
-            elif sys.platform.startswith("darwin"):
-                font_path = "/System/Library/Fonts/STHeiti Medium.ttc"  # macOS黑体字体路径示例
-            else:
-                font_path = "/usr/share/fonts/truetype/arphic/ukai.ttc"  # Linux下常见中文字体路径示例
-            font = ImageFont.truetype(font_path, 18)
-        except Exception:
-            font = ImageFont.load_default()
-
-        for shape in self.shapes:
-            if shape[0] == 'circle':
-                x1, y1, x2, y2 = shape[1]
-                draw.ellipse([x1, y1, x2, y2], outline="red", width=3)
-            elif shape[0] == 'text':
-                x, y, text = shape[1]
-                draw.text((x, y), text, fill="blue", font=font)
-
-        # 保存覆盖原文件
-        final_img.save(self.image_path)
+        # 标注不写入像素，仅以矢量记录（原图坐标）返回，由调用方保存
+        self.annotations = to_records(self.shapes)
         self.save_result = True
+        self._finish()
+
+    def _finish(self):
         self.destroy()
+        if self.on_done:
+            self.on_done(self)
 
     def on_escape(self, event=None):
         self.root.attributes('-topmost', True)
@@ -121,9 +195,9 @@ class Annotator(tk.Toplevel):
             self.on_save()
         else:
             self.save_result = False
-            self.destroy()
+            self._finish()
         self.root.attributes('-topmost', False)
 
     def on_close(self):
         self.save_result = False
-        self.destroy()
\ No newline at end of file
+        self._finish()
\ No newline at end of file
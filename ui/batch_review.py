@@ -0,0 +1,156 @@
+# ui/batch_review.py
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+from PIL import ImageTk
+from ui.annotator import Annotator
+
+
+class BatchReviewWindow(tk.Toplevel):
+    """
+    连拍批量审阅：逐张查看队列中的截图，补充标注、修改归属的用例 / 步骤或丢弃，
+    确认后由调用方一次性写入 Word 和 Excel
+    """
+
+    def __init__(self, root, shots, targets, on_done=None):
+        super().__init__(root)
+        self.root = root
+        self.shots = shots
+        # 可选归属：(行号, 测试名称, 验证点, 步骤序号, 步骤说明)
+        self.targets = list(targets)
+        for shot in shots:
+            if shot.target not in self.targets:
+                self.targets.append(shot.target)
+        self.on_done = on_done  # 窗口关闭后回调 on_done(self)，committed 为 True 表示确认写入
+        self.committed = False
+        self.tk_image = None
+
+        self.title(f"批量审阅（共 {len(shots)} 张）")
+        self.geometry("820x420")
+        self.attributes("-topmost", True)
+        self.protocol("WM_DELETE_WINDOW", self.on_cancel)
+        self.grid_rowconfigure(0, weight=1)
+        self.grid_columnconfigure(1, weight=1)
+
+        # 左侧截图列表，右侧缩略图、归属和操作按钮
+        self.listbox = tk.Listbox(self, width=40, exportselection=False)
+        self.listbox.grid(row=0, column=0, rowspan=3, sticky="nsew", padx=5, pady=5)
+        self.listbox.bind("<<ListboxSelect>>", lambda e: self._show_selected())
+
+        self.preview = tk.Label(self)
+        self.preview.grid(row=0, column=1, sticky="nsew", padx=5, pady=5)
+
+        self.target_box = ttk.Combobox(self, values=[self._target_label(t) for t in self.targets],
+                                       state="readonly", width=70)
+        self.target_box.grid(row=1, column=1, sticky="ew", padx=5, pady=2)
+        self.target_box.bind("<<ComboboxSelected>>", self.on_target_selected)
+
+        btn_frame = tk.Frame(self)
+        btn_frame.grid(row=2, column=1, sticky="ew", padx=5, pady=5)
+        tk.Button(btn_frame, text="标注 (Enter)", command=self.on_annotate).pack(side="left", padx=5)
+        self.btn_discard = tk.Button(btn_frame, text="丢弃 (Delete)", command=self.on_discard)
+        self.btn_discard.pack(side="left", padx=5)
+        tk.Button(btn_frame, text="全部写入", command=self.on_commit).pack(side="left", padx=5)
+        tk.Button(btn_frame, text="取消", command=self.on_cancel).pack(side="left", padx=5)
+
+        self.bind("<Return>", self.on_annotate)
+        self.bind("<Delete>", self.on_discard)
+        self.bind("<Escape>", self.on_cancel)
+
+        self._refresh_list()
+        if shots:
+            self.listbox.selection_set(0)
+            self._show_selected()
+        self.focus_set()
+        self.grab_set()
+
+    @staticmethod
+    def _target_label(target):
+        _, filename, checkpoint, step_index, step_note = target
+        label = f"{filename} / {checkpoint}"
+        if step_index is not None:
+            label += f" / 第 {step_index + 1} 步 {step_note}"
+        return label
+
+    def _shot_label(self, position, shot):
+        _, filename, _, step_index, _ = shot.target
+        label = f"{position + 1}. {shot.captured_at} {filename}"
+        if step_index is not None:
+            label += f" 第 {step_index + 1} 步"
+        if shot.annotations:
+            label += f"（标注 {len(shot.annotations)} 处）"
+        if shot.duplicate:
+            label += "（重复）"
+        if shot.discarded:
+            label += "（丢弃）"
+        return label
+
+    def _refresh_list(self):
+        selection = self.listbox.curselection()
+        self.listbox.delete(0, tk.END)
+        for position, shot in enumerate(self.shots):
+            self.listbox.insert(tk.END, self._shot_label(position, shot))
+            if shot.discarded:
+                self.listbox.itemconfig(position, fg="gray")
+        if selection:
+            self.listbox.selection_set(selection[0])
+
+    def _selected(self):
+        selection = self.listbox.curselection()
+        return self.shots[selection[0]] if selection else None
+
+    def _show_selected(self):
+        shot = self._selected()
+        if shot is None:
+            return
+        self.tk_image = ImageTk.PhotoImage(shot.thumbnail)
+        self.preview.config(image=self.tk_image)
+        self.target_box.current(self.targets.index(shot.target))
+        self.btn_discard.config(text="恢复 (Delete)" if shot.discarded else "丢弃 (Delete)")
+
+    def on_target_selected(self, event=None):
+        shot = self._selected()
+        if shot is not None:
+            shot.target = self.targets[self.target_box.current()]
+            self._refresh_list()
+
+    def on_annotate(self, event=None):
+        shot = self._selected()
+        if shot is None:
+            return
+
+        def on_done(annotator):
+            if annotator.save_result:
+                shot.annotations = annotator.annotations
+                self._refresh_list()
+            self.grab_set()
+            self.focus_set()
+
+        self.grab_release()
+        annotator = Annotator(self.root, image=shot.load_image(), annotations=shot.annotations, on_done=on_done)
+        annotator.grab_set()
+
+    def on_discard(self, event=None):
+        shot = self._selected()
+        if shot is not None:
+            shot.discarded = not shot.discarded
+            self._refresh_list()
+            self._show_selected()
+
+    def on_commit(self):
+        count = sum(1 for shot in self.shots if not shot.discarded)
+        if not messagebox.askokcancel("确认", f"将 {count} 张截图写入 Word 并标记 Excel？", parent=self):
+            return
+        self.committed = True
+        self._finish()
+
+    def on_cancel(self, event=None):
+        # 取消时截图保留在队列中，可稍后再次审阅
+        self.committed = False
+        self._finish()
+
+    def _finish(self):
+        self.grab_release()
+        self.destroy()
+        if self.on_done:
+            self.on_done(self)
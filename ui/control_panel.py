@@ -2,14 +2,27 @@
 
 import tkinter as tk
 from tkinter import messagebox
+import os
+import queue
 import threading
 import time
+from concurrent.futures import Future
 import keyboard
+from core.batch_builder import build_from_manifest
+from core.burst_capture import BurstCapture
 from core.screenshot import ScreenshotTool
+from ui.batch_review import BatchReviewWindow
+from utils import config
+from utils.image_hash import hamming, is_similar
+from utils.metrics import tracer
+from utils.path_utils import get_base_path
+from utils.run_manifest import RunManifest
+from utils.tk_dispatch import MainThreadDispatcher
 from utils.word_generator import WordGenerator
 
 class ControlPanel(tk.Toplevel):
-    def __init__(self, logger, pending_cases, excel_handler, root, is_step_mode=False):
+    def __init__(self, logger, pending_cases, excel_handler, root, is_step_mode=False, resume_steps=None,
+                 progress_journal=None):
         super().__init__(root)
         self.logger = logger
         self.pending_cases = pending_cases
@@ -17,19 +30,39 @@ class ControlPanel(tk.Toplevel):
         self.root = root
 
         self.title("控制面板")
-        self.geometry("450x300")
+        self.geometry("450x330")
         self.attributes("-topmost", True)
         self.protocol("WM_DELETE_WINDOW", self.on_exit)
         self.resizable(True, True)
 
-        # 状态变量
+        # 状态变量；finished 在全部用例执行完毕时置为 True（中途退出为 False）
+        self.finished = False
+        # 结束时正在后台生成报告，界面操作全部忽略
+        self._closing = False
         self.current_index = 0
         self.current_case = None
-        self.screenshot_tool = ScreenshotTool(self.logger, root)
-        self.word_generator = WordGenerator(self.logger, root)
-
-        # 事件控制，截图完成通知
+        self.dispatcher = MainThreadDispatcher.for_root(root)
+        self.screenshot_tool = ScreenshotTool(self.logger, root, dispatcher=self.dispatcher)
+        # 逐条写入时，截图所在文档保存后才把对应行标记为已执行
+        self.word_generator = WordGenerator(self.logger, root, on_saved=excel_handler.mark_cases_executed)
+
+        # 延后生成报告：每张截图只追加运行清单，结束时一次性生成
+        self.manifest = None
+        # 最近一张截图（用例名、图片、哈希、归档路径、标注），用于检测并复用重复截图
+        self._last_shot = None
+        if config.DEFERRED_REPORTS and config.ARCHIVE_CAPTURES:
+            manifest_dir = os.path.join(get_base_path(), config.MANIFEST_DIR)
+            self.manifest = RunManifest.create(manifest_dir, excel_handler.file_path)
+            self.logger.log(f"运行清单：{self.manifest.path}")
+
+        # 事件控制，截图完成通知；同一时间只允许一个截图流程
         self.screenshot_done_event = threading.Event()
+        self._flow_lock = threading.Lock()
+
+        # 连拍：F8 只截图入队，批量审阅时再标注、调整归属并统一写入
+        self.burst = BurstCapture(self.screenshot_tool, self.logger, before_grab=self._hide_for_burst)
+        self.burst_mode = tk.BooleanVar(value=config.BURST_MODE)
+        self.burst_enabled = config.BURST_MODE
 
         self.is_step_mode = is_step_mode
         if self.is_step_mode:
@@ -38,8 +71,18 @@ class ControlPanel(tk.Toplevel):
             self.current_step_index = 0
             self.pending_cases = pending_cases
             self.current_case_steps = []
+            # 续跑：{(测试名称, 验证点): 起始步骤序号}，每完成或跳过一步写入进度日志
+            self.resume_steps = resume_steps or {}
+            self.progress_journal = progress_journal
+            self._loaded_case_key = None
 
         self.create_widgets()
+        # 实时显示最近一次各阶段耗时：记录线程只入队，主线程定时取出刷新
+        self._stage_ms = {}
+        self._stage_queue = queue.Queue()
+        if config.METRICS_LIVE:
+            tracer.add_listener(self._on_stage_timed)
+            self.after(config.LOG_UI_INTERVAL_MS, self._drain_stage_times)
         self.load_case()
         self.bind("<Configure>", self._on_resize)
 
@@ -65,6 +108,12 @@ class ControlPanel(tk.Toplevel):
 
         self.btn_complete = tk.Button(btn_frame, text="完成", command=self.on_complete)
         self.btn_complete.grid(row=0, column=3, padx=5)
+
+        self.chk_burst = tk.Checkbutton(btn_frame, text="连拍模式", variable=self.burst_mode,
+                                        command=self.on_toggle_burst)
+        self.chk_burst.grid(row=1, column=0, columnspan=2, padx=5, pady=(5, 0))
+        self.btn_review = tk.Button(btn_frame, text="批量审阅 (0)", command=self.on_review)
+        self.btn_review.grid(row=1, column=2, columnspan=2, padx=5, pady=(5, 0))
         # 信息显示区域（底部）
         info_frame = tk.Frame(self)
         info_frame.pack(pady=10, padx=10, fill="both", expand=True)
@@ -84,8 +133,13 @@ class ControlPanel(tk.Toplevel):
         add_row("步骤描述：", "lbl_step_desc")
         add_row("预期结果：", "lbl_expected")
         add_row("当前进度：", "lbl_progress")
+        add_row("提示：", "lbl_notice")
+        self.lbl_notice.config(fg="red")
+        if config.METRICS_LIVE:
+            add_row("阶段耗时：", "lbl_timing")
 
     def load_case(self):
+        self.lbl_notice.config(text="")
         if self.is_step_mode:
             if self.current_case_key_index >= len(self.step_case_keys):
                 self.finish_all_cases()
@@ -93,6 +147,11 @@ class ControlPanel(tk.Toplevel):
 
             case_key = self.step_case_keys[self.current_case_key_index]
             self.current_case_steps = self.pending_cases[case_key]
+            if case_key != self._loaded_case_key:
+                self._loaded_case_key = case_key
+                self.current_step_index = self.resume_steps.get(case_key, 0)
+                if self.current_step_index:
+                    self.logger.log(f"用例 {case_key[0]} 从第 {self.current_step_index + 1} 步继续")
             if self.current_step_index >= len(self.current_case_steps):
                 self.btn_complete.config(state="normal")
                 return
@@ -148,58 +207,275 @@ class ControlPanel(tk.Toplevel):
         self.btn_complete.config(state="disabled")
 
     def on_screenshot(self):
+        # F8 可能连按：连拍模式只截图入队；普通模式上一次截图流程未结束时忽略
+        if self._closing:
+            return
+        if self.burst_enabled:
+            self._burst_screenshot()
+            return
+        if not self._flow_lock.acquire(blocking=False):
+            self.logger.log("上一次截图流程尚未结束，忽略本次截图", "WARNING")
+            return
+
         # 截图 + 标注 + Word生成流程
         def run_screenshot_flow():
             idx, filename, checkpoint = self.current_case
-            timestamp = time.strftime("%Y%m%d_%H%M%S")
-            file_name = f"{filename}_{timestamp}.png"
+            step_index = self.current_step_index if self.is_step_mode else None
+            shot_name = f"{filename}_{time.strftime('%Y%m%d_%H%M%S')}"
 
-            self.logger.log(f"开始截图: {file_name}")
+            self.logger.log(f"开始截图: {shot_name}")
 
-            # 截图
-            img_path = self.screenshot_tool.capture_screen(file_name)
+            # 截图：全程在内存中传递图片，原始截图在标注期间后台归档
+            img = self.screenshot_tool.grab()
 
-            if not img_path:
+            if img is None:
                 self.logger.log("截图失败或取消")
                 self.screenshot_done_event.set()
-                self.root.after(0, self._restore_control_panel)
+                self.dispatcher.call(self._restore_control_panel)
                 return
 
-            # 标注
-            annotated_path = self.screenshot_tool.annotate(img_path)
-            if not annotated_path:
+            # 与该用例上一张截图近似重复时提示，reuse 策略下直接复用上一张（不再编码归档）
+            image_hash = self.screenshot_tool.last_hash
+            previous = self._last_shot if self._last_shot and self._last_shot["case"] == filename else None
+            reuse = False
+            notice = ""
+            if previous and is_similar(image_hash, previous["hash"], config.DUPLICATE_THRESHOLD):
+                reuse = config.DUPLICATE_POLICY == "reuse"
+                notice = f"与上一张截图几乎相同{'，已复用上一张' if reuse else ''}"
+                self.logger.log(f"重复截图：{notice}（汉明距离 {hamming(image_hash, previous['hash'])}）", "WARNING")
+            self.dispatcher.call(self.lbl_notice.config, text=notice)
+
+            if reuse:
+                img, image_hash = previous["image"], previous["hash"]
+                image_key, path_future = previous["key"], previous["path_future"]
+            else:
+                image_key = f"{shot_name}#{image_hash:016x}" if image_hash is not None else None
+                path_future = self.screenshot_tool.archive(img) if config.ARCHIVE_CAPTURES else None
+
+            # 标注：仅得到矢量记录，导出Word时再绘制；复用时带出上一张的标注
+            annotations = self.screenshot_tool.annotate(img, previous["annotations"] if reuse else None)
+            if annotations is None:
                 self.logger.log("标注取消或失败")
                 self.screenshot_done_event.set()
-                self.root.after(0, self._restore_control_panel)
+                self.dispatcher.call(self._restore_control_panel)
                 return
+            self._last_shot = {"case": filename, "image": img, "hash": image_hash, "key": image_key,
+                               "path_future": path_future, "annotations": annotations}
+            if path_future is not None:
+                # 标注记录写在存储中的图片旁，不依赖报告生成方式，之后可重新编辑和导出
+                self.screenshot_tool.save_annotations(path_future, img.size, annotations)
 
             # 步骤说明
             step_note = ""
             if self.is_step_mode:
-                step = self.current_case_steps[self.current_step_index]
+                step = self.current_case_steps[step_index]
                 step_note = f"{step['步骤名称']} - {step['步骤描述']}"
 
-            self.word_generator.add_image_to_word(filename, checkpoint, annotated_path, step_note)
+            archived = self._archived_path(path_future)
+            doc_position = None
+            if self.manifest is not None and archived is not None:
+                # 延后生成：只追加一行清单（截图在存储中的路径与标注），Word 与 Excel 在运行结束时统一处理
+                self.manifest.append(filename, checkpoint, step_note, archived, idx, annotations)
+                self.logger.log(f"用例 {filename} 截图已记录到运行清单")
+                recorded = True
+            else:
+                doc_position = self.word_generator.add_image_to_word(filename, checkpoint, img, step_note,
+                                                                     annotations, image_key, row=idx)
+                recorded = doc_position is not None
+                if recorded:
+                    self.logger.log(f"用例 {filename} 截图已写入Word缓存，文档保存后标记为已执行")
 
-            # 标记已执行
-            self.excel_handler.mark_case_executed(idx)
-            self.logger.log(f"用例 {filename} 标记为已执行")
+            if recorded and self.is_step_mode and self.progress_journal is not None:
+                self.progress_journal.record_step(filename, checkpoint, step_index, idx, archived, doc_position)
 
             self.screenshot_done_event.set()
             self.logger.log("screenshot_done_event.set() 已调用")
-            self.root.after(0, lambda: self.btn_complete.config(state="normal"))
-            self.root.after(0, self._restore_control_panel)
+            self.dispatcher.call(self.btn_complete.config, state="normal")
+            self.dispatcher.call(self._restore_control_panel)
+
+        def guarded_flow():
+            try:
+                run_screenshot_flow()
+            finally:
+                self._flow_lock.release()
 
         self.screenshot_done_event.clear()
         self.attributes("-topmost", False)  # 取消置顶，防止截图残留
         self.withdraw()  # 隐藏控制面板
-        threading.Thread(target=run_screenshot_flow, daemon=True).start()
+        threading.Thread(target=guarded_flow, daemon=True).start()
+
+    def on_toggle_burst(self):
+        self.burst_enabled = self.burst_mode.get()
+        self.logger.log(f"连拍模式已{'开启' if self.burst_enabled else '关闭'}")
+
+    def _current_target(self):
+        # 当前用例（步骤）作为连拍截图的暂定归属
+        idx, filename, checkpoint = self.current_case
+        if self.is_step_mode:
+            step = self.current_case_steps[self.current_step_index]
+            return idx, filename, checkpoint, self.current_step_index, f"{step['步骤名称']} - {step['步骤描述']}"
+        return idx, filename, checkpoint, None, ""
+
+    def _review_targets(self):
+        # 批量审阅时可选的归属：基础版为全部待执行用例，步骤版为全部待执行步骤
+        if not self.is_step_mode:
+            return [(idx, filename, checkpoint, None, "") for idx, filename, checkpoint in self.pending_cases]
+        targets = []
+        for (filename, checkpoint), steps in self.pending_cases.items():
+            for step_index, step in enumerate(steps):
+                targets.append((step["index"], filename, checkpoint, step_index,
+                                f"{step['步骤名称']} - {step['步骤描述']}"))
+        return targets
+
+    def _burst_screenshot(self):
+        # 可能在快捷键线程中调用，界面更新交给主线程
+        if self.current_case is None or self._flow_lock.locked():
+            return
+        reason = self.burst.trigger(self._current_target(), self._on_burst_captured)
+        if reason:
+            self.logger.log(f"连拍截图被拒绝：{reason}", "WARNING")
+            self.dispatcher.call(self.lbl_notice.config, text=reason)
+
+    def _hide_for_burst(self):
+        # 连拍后台线程中调用：等待主线程隐藏控制面板后再截图（窗口已关闭时超时放弃）
+        def hide():
+            self.attributes("-topmost", False)
+            self.withdraw()
+        self.dispatcher.call(hide).result(timeout=2)
+
+    def _on_burst_captured(self, shot):
+        if shot is not None:
+            # 当前步骤已有截图，允许进入下一步 / 完成
+            self.screenshot_done_event.set()
+            self.dispatcher.call(self.btn_complete.config, state="normal")
+        self.dispatcher.call(self._update_burst_status, "与上一张截图几乎相同" if shot and shot.duplicate else "")
+        self.dispatcher.call(self._restore_control_panel)
+
+    def _update_burst_status(self, notice=""):
+        self.btn_review.config(text=f"批量审阅 ({len(self.burst)})")
+        self.lbl_notice.config(text=notice)
+
+    def on_review(self, then=None):
+        """
+        打开批量审阅窗口；确认后在后台写入，完成后在主线程调用 then
+        """
+        shots = self.burst.pending()
+        if not shots:
+            self._show_warning("连拍队列中没有待写入的截图")
+            return
+
+        def on_done(window):
+            if window.committed:
+                threading.Thread(target=self._commit_burst, args=(window.shots, then or self._after_burst_commit),
+                                 daemon=True).start()
+
+        BatchReviewWindow(self.root, shots, self._review_targets(), on_done=on_done)
+
+    def _commit_burst(self, shots, then):
+        """
+        按截图顺序写入 Word（或运行清单），保存涉及的文档后标记 Excel；丢弃和写入成功的截图移出队列
+        """
+        start = time.perf_counter()
+        done, cases = [], set()
+        for shot in shots:
+            if shot.discarded:
+                done.append(shot)
+                continue
+            idx, filename, checkpoint, step_index, step_note = shot.target
+            archived = self._archived_path(shot.path_future)
+            doc_position = None
+            if self.manifest is not None and archived is not None:
+                self.manifest.append(filename, checkpoint, step_note, archived, idx, shot.annotations)
+                recorded = True
+            else:
+                doc_position = self.word_generator.add_image_to_word(
+                    filename, checkpoint, archived or shot.load_image(), step_note, shot.annotations,
+                    shot.image_key, row=idx)
+                recorded = doc_position is not None
+                if recorded:
+                    cases.add(filename)
+            if not recorded:
+                continue
+            done.append(shot)
+            if shot.path_future is not None:
+                self.screenshot_tool.save_annotations(shot.path_future, shot.size, shot.annotations)
+            if self.is_step_mode and self.progress_journal is not None:
+                self.progress_journal.record_step(filename, checkpoint, step_index, idx, archived, doc_position)
+
+        # 文档保存后由 WordGenerator 回调标记 Excel
+        for case_name in cases:
+            self.word_generator.flush(case_name)
+        self.burst.remove(done)
+        failed = len(shots) - len(done)
+        self.logger.log(f"连拍批量写入 {len(done)} 张，失败 {failed} 张，"
+                        f"耗时 {(time.perf_counter() - start) * 1000:.0f} ms")
+        self.dispatcher.call(self._update_burst_status, f"{failed} 张截图写入失败，仍在队列中" if failed else "")
+        self.dispatcher.call(then)
+
+    def _after_burst_commit(self):
+        # 全部用例已走完（结束前打开的审阅）时写入后结束，否则停留在当前用例
+        if self.is_step_mode:
+            all_done = self.current_case_key_index >= len(self.step_case_keys)
+        else:
+            all_done = self.current_index >= len(self.pending_cases)
+        if all_done:
+            self.finish_all_cases()
+
+    def _archived_path(self, path_future):
+        # 等待后台存储完成（通常在标注期间已完成），失败时返回 None
+        if path_future is None:
+            return None
+        try:
+            return path_future.result()
+        except Exception as e:
+            self.logger.log(f"截图存储失败：{e}", "ERROR")
+            return None
+
+    def _on_stage_timed(self, name, seconds):
+        # 在记录线程中调用，可能持有 Word / Excel 锁：只入队，不触碰界面
+        self._stage_queue.put((name, seconds))
+
+    def _drain_stage_times(self):
+        # 主线程中执行：取出队列中全部耗时记录，合并刷新一次
+        updated = False
+        try:
+            while True:
+                name, seconds = self._stage_queue.get_nowait()
+                self._stage_ms[name] = seconds * 1000
+                updated = True
+        except queue.Empty:
+            pass
+        try:
+            if not self.winfo_exists():
+                return
+            if updated:
+                text = "  ".join(f"{stage} {ms:.0f}ms" for stage, ms in self._stage_ms.items())
+                self.lbl_timing.config(text=text)
+            self.after(config.LOG_UI_INTERVAL_MS, self._drain_stage_times)
+        except tk.TclError:
+            # 窗口已销毁
+            pass
+
+    def _report_metrics(self):
+        # 记录器为进程内共用，输出本次运行的统计后清空，队列中的下一个工作簿重新统计
+        tracer.remove_listener(self._on_stage_timed)
+        tracer.log_summary(self.logger)
+        tracer.reset()
 
     def _restore_control_panel(self):
         self.deiconify()
         self.attributes('-topmost', True)
+        annotated_at = self.screenshot_tool.annotated_at
+        if annotated_at is not None:
+            self.screenshot_tool.annotated_at = None
+            self.update_idletasks()
+            self.logger.log(f"标注保存到控制面板就绪：{(time.perf_counter() - annotated_at) * 1000:.0f} ms")
 
     def on_complete(self):
+        if self.current_case:
+            # 用例完成，写出该用例的Word缓存
+            self.word_generator.flush(self.current_case[1])
+
         if self.is_step_mode and self.current_step_index == len(self.current_case_steps) - 1:
             # 最后一步允许直接完成，无需截图完成标记
             self.current_case_key_index += 1
@@ -236,47 +512,135 @@ class ControlPanel(tk.Toplevel):
     def on_skip(self):
         if self.is_step_mode:
             self.logger.log(f"跳过步骤 {self.current_step_index + 1}")
+            if self.progress_journal is not None:
+                idx, filename, checkpoint = self.current_case
+                self.progress_journal.record_step(filename, checkpoint, self.current_step_index, idx, skipped=True)
             self.current_step_index += 1
             self.screenshot_done_event.clear()
 
             if self.current_step_index >= len(self.current_case_steps):
                 self.logger.log("当前用例所有步骤已跳过，进入下一用例")
+                self.word_generator.flush(self.current_case[1])
                 self.current_case_key_index += 1
                 self.current_step_index = 0
             self.load_case()
             return
 
         self.logger.log(f"跳过用例 {self.current_case[1]}")
+        self.word_generator.flush(self.current_case[1])
         self.current_index += 1
         self.load_case()
         self.screenshot_done_event.clear()
 
     def finish_all_cases(self):
-        try:
-            keyboard.remove_hotkey('f8')
-            self.logger.log("F8快捷键已移除")
-        except Exception as e:
-            self.logger.log(f"移除F8快捷键失败: {e}")
+        if self._closing:
+            return
+        if len(self.burst):
+            # 连拍队列中还有未写入的截图：先批量审阅，写入后再结束
+            self.on_review()
+            return
+        self.finished = True
+        self._stop_capture()
+        future = self._assemble_reports()
+        future.add_done_callback(lambda f: self.dispatcher.call(self._on_run_finished, f))
+
+    def _on_run_finished(self, future):
+        # 报告生成完毕（主线程）：提示结果后关闭控制面板
+        if self._check_reports(future) and self.is_step_mode and self.progress_journal is not None:
+            # 全部执行完毕，不再需要续跑
+            self.progress_journal.clear()
+        self._report_metrics()
         self.root.attributes('-topmost', True)
         messagebox.showinfo("完成", "所有用例已执行完毕", parent=self.root)
         self.root.attributes('-topmost', False)
         self.destroy()
         self.root.deiconify()
 
-    def on_exit(self):
-        self.root.attributes('-topmost', True)
-        if messagebox.askokcancel("退出", "确定退出测试？", parent=self.root):
+    def _stop_capture(self):
+        # 进入结束流程：停止连拍、移除快捷键并禁用界面操作
+        self._closing = True
+        self.burst.close()
+        self.screenshot_tool.close()
+        try:
+            keyboard.remove_hotkey('f8')
+            self.logger.log("F8快捷键已移除")
+        except Exception as e:
+            self.logger.log(f"移除F8快捷键失败: {e}")
+        for button in (self.btn_screenshot, self.btn_skip, self.btn_next, self.btn_complete, self.btn_review,
+                       self.chk_burst):
+            button.config(state="disabled")
+        self.lbl_notice.config(text="正在生成报告并回写 Excel，请稍候……")
+
+    def _assemble_reports(self):
+        """
+        在后台线程中写出 Word 缓存、按运行清单生成报告并回写 Excel，返回 Future（结果为生成失败的用例列表）；
+        生成进度通过调度器显示在控制面板上，界面保持响应
+        """
+        future = Future()
+
+        def assemble():
             try:
-                keyboard.remove_hotkey('f8')
-                self.logger.log("F8快捷键已移除")
+                future.set_result(self._build_reports())
             except Exception as e:
-                self.logger.log(f"移除F8快捷键失败: {e}")
+                future.set_exception(e)
+
+        threading.Thread(target=assemble, daemon=True).start()
+        return future
+
+    def _build_reports(self):
+        self.word_generator.flush_all()
+        failed = []
+        shots = self.manifest.shots() if self.manifest is not None else []
+        if shots:
+            # 按清单一次性生成报告并回写状态，各用例文档相互独立；用例较少时在当前进程中生成，
+            # 否则使用少量工作进程（进程启动开销在打包的 exe 中尤其明显）
+            cases = len({shot["case"] for shot in shots})
+            workers = 1 if cases <= config.REPORT_INPROCESS_CASES else max(1, config.REPORT_WORKERS)
+            rows, failed = build_from_manifest(self.logger, self.manifest, self.word_generator.output_dir,
+                                               workers=workers, on_progress=self._on_report_progress)
+            self.excel_handler.mark_cases_executed(sorted(set(rows)))
+        elif self.manifest is not None:
+            self.manifest.discard()
+        self.excel_handler.flush_status()
+        return failed
+
+    def _on_report_progress(self, finished, total):
+        # 后台线程中调用，界面更新交给主线程
+        self.dispatcher.call(self.lbl_progress.config, text=f"正在生成报告：{finished} / {total} 个用例")
+
+    def _check_reports(self, future):
+        # 提示报告生成结果，全部成功返回 True
+        try:
+            failed = future.result()
+        except Exception as e:
+            self.logger.log(f"生成报告失败：{e}", "ERROR")
+            self._show_warning(f"生成报告失败，可稍后按运行清单重新生成：{e}")
+            return False
+        if failed:
+            self._show_warning(f"以下用例报告生成失败，可稍后按运行清单重新生成：{', '.join(failed)}")
+        return not failed
+
+    def on_exit(self):
+        if self._closing:
+            # 正在生成报告，完成后自动关闭
+            return
+        self.root.attributes('-topmost', True)
+        pending = len(self.burst)
+        message = f"连拍队列中还有 {pending} 张截图未写入，退出将丢弃。\n确定退出测试？" if pending else "确定退出测试？"
+        if messagebox.askokcancel("退出", message, parent=self.root):
             self.root.attributes('-topmost', False)
-            self.root.destroy()
-            self.destroy()
+            self._stop_capture()
+            future = self._assemble_reports()
+            future.add_done_callback(lambda f: self.dispatcher.call(self._on_exit_finished, f))
         else:
             self.root.attributes('-topmost', False)
 
+    def _on_exit_finished(self, future):
+        self._check_reports(future)
+        self._report_metrics()
+        self.root.destroy()
+        self.destroy()
+
     def _show_warning(self, msg):
         self.root.attributes('-topmost', True)
         messagebox.showwarning("警告", msg, parent=self.root)
@@ -286,7 +650,8 @@ class ControlPanel(tk.Toplevel):
         try:
             width = self.winfo_width()
             new_wraplength = max(width - 160, 120)
-            for attr in ["lbl_case_name", "lbl_checkpoint", "lbl_step_name", "lbl_step_desc", "lbl_expected", "lbl_progress"]:
+            for attr in ["lbl_case_name", "lbl_checkpoint", "lbl_step_name", "lbl_step_desc", "lbl_expected", "lbl_progress",
+                         "lbl_notice", "lbl_timing"]:
                 label = getattr(self, attr, None)
                 if label:
                     label.config(wraplength=new_wraplength)
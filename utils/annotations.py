@@ -0,0 +1,85 @@
+# utils/annotations.py
+
+import functools
+import json
+import os
+import sys
+from PIL import ImageDraw, ImageFont
+
+SIDECAR_VERSION = 1
+CIRCLE_WIDTH = 3
+TEXT_SIZE = 18
+
+
+def sidecar_path(image_path):
+    return os.path.splitext(image_path)[0] + ".json"
+
+
+def to_records(shapes):
+    """
+    将标注窗口的 shapes 列表（原图坐标）转为可序列化的记录
+    """
+    records = []
+    for shape in shapes:
+        if shape[0] == 'circle':
+            records.append({"type": "circle", "box": [round(c, 1) for c in shape[1]]})
+        elif shape[0] == 'text':
+            x, y, text = shape[1]
+            records.append({"type": "text", "pos": [round(x, 1), round(y, 1)], "text": text})
+    return records
+
+
+def save_sidecar(image_path, size, annotations):
+    """
+    在截图旁写入标注 JSON，返回文件路径
+    """
+    path = sidecar_path(image_path)
+    data = {"version": SIDECAR_VERSION, "size": list(size), "shapes": annotations}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    return path
+
+
+def load_sidecar(image_path):
+    """
+    读取截图对应的标注记录，无标注文件时返回空列表
+    """
+    path = sidecar_path(image_path)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get("shapes", [])
+
+
+@functools.lru_cache(maxsize=None)
+def annotation_font(size=TEXT_SIZE):
+    """
+    跨平台加载支持中文的字体，优先使用常见系统字体，否则降级为默认字体；结果缓存复用
+    """
+    try:
+        if sys.platform.startswith("win"):
+            font_path = os.path.join("C:\\Windows\\Fonts", "msyh.ttc")
+        elif sys.platform.startswith("darwin"):
+            font_path = "/System/Library/Fonts/STHeiti Medium.ttc"  # macOS黑体字体路径示例
+        else:
+            font_path = "/usr/share/fonts/truetype/arphic/ukai.ttc"  # Linux下常见中文字体路径示例
+        return ImageFont.truetype(font_path, size)
+    except Exception:
+        return ImageFont.load_default()
+
+
+def render_annotations(image, annotations):
+    """
+    将标注记录绘制到图片副本上并返回；无标注时原样返回
+    """
+    if not annotations:
+        return image
+    final_img = image.copy() if image.mode in ("RGB", "RGBA") else image.convert("RGB")
+    draw = ImageDraw.Draw(final_img)
+    font = annotation_font()
+    for shape in annotations:
+        if shape["type"] == "circle":
+            draw.ellipse(shape["box"], outline="red", width=CIRCLE_WIDTH)
+        elif shape["type"] == "text":
+            draw.text(tuple(shape["pos"]), shape["text"], fill="blue", font=font)
+    return final_img
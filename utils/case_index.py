@@ -0,0 +1,115 @@
+# utils/case_index.py
+
+import numpy as np
+import pandas as pd
+
+DONE_STATUSES = ('已执行', 'pass', 'passed')
+STEP_FIELDS = ('步骤名称', '步骤描述', '预期结果')
+
+
+def _normalize(series):
+    """
+    统一转为去空白字符串，空值记为 ''；只对去重后的取值做字符串处理
+    """
+    codes, uniques = pd.factorize(series)
+    values = np.array([str(value).strip() for value in uniques] + [''], dtype=object)
+    return values[codes]
+
+
+def _forward_fill(values):
+    filled = pd.Series(values).replace('', np.nan).ffill().fillna('')
+    return filled.to_numpy(dtype=object)
+
+
+class CaseIndex:
+    """
+    用例索引：一次性完成向前填充、状态归一化和分组，
+    分组边界以整数数组保存，基础版和步骤版共用
+    """
+
+    def __init__(self, df):
+        self.row_labels = df.index.to_numpy()
+        self._positions = pd.Index(self.row_labels)
+        self.size = len(df)
+
+        self.raw_names = _normalize(df['测试名称'])
+        self.raw_checkpoints = _normalize(df['验证点'])
+        status_codes, status_values = pd.factorize(df['测试结果'])
+        done_values = np.array([str(value).strip().lower() in DONE_STATUSES for value in status_values] + [False])
+        self.done = done_values[status_codes]
+
+        # 合并单元格场景：测试名称、验证点各自向前填充
+        self.names = _forward_fill(self.raw_names)
+        self.checkpoints = _forward_fill(self.raw_checkpoints)
+
+        # 按（测试名称, 验证点）分组，组序号按首次出现顺序
+        name_codes, name_uniques = pd.factorize(self.names)
+        check_codes, check_uniques = pd.factorize(self.checkpoints)
+        pair_codes = name_codes.astype(np.int64) * max(len(check_uniques), 1) + check_codes
+        codes, firsts = pd.factorize(pair_codes)
+        firsts = np.asarray(firsts)
+        self.group_keys = list(zip(name_uniques[firsts // max(len(check_uniques), 1)].tolist(),
+                                   check_uniques[firsts % max(len(check_uniques), 1)].tolist()))
+        self.group_codes = codes.astype(np.int32)
+        self.group_order = np.argsort(self.group_codes, kind='stable').astype(np.int32)
+        counts = np.bincount(self.group_codes, minlength=len(self.group_keys))
+        self.group_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+
+        self._df = df
+        self._step_fields = None
+
+    @property
+    def step_fields(self):
+        # 步骤列仅步骤版需要，首次访问时再归一化
+        if self._step_fields is None:
+            df = self._df
+            self._step_fields = {
+                field: _normalize(df[field]) if field in df.columns else np.full(self.size, '', dtype=object)
+                for field in STEP_FIELDS
+            }
+        return self._step_fields
+
+    def position(self, label):
+        return self._positions.get_loc(label)
+
+    def mark_done(self, label):
+        self.done[self.position(label)] = True
+
+    def group_rows(self, group):
+        """
+        返回组内各行的位置（按原始行序）
+        """
+        return self.group_order[self.group_offsets[group]:self.group_offsets[group + 1]]
+
+    def pending_rows(self):
+        """
+        基础版：返回未执行行的位置
+        """
+        return np.flatnonzero(~self.done)
+
+    def pending_groups(self):
+        """
+        步骤版：返回至少有一行未执行的组序号
+        """
+        undone = np.bincount(self.group_codes, weights=~self.done, minlength=len(self.group_keys))
+        return np.flatnonzero(undone > 0)
+
+    def step_cases(self, groups=None):
+        """
+        步骤版：返回 {(测试名称, 验证点): [步骤字典, ...]}
+        """
+        if groups is None:
+            groups = range(len(self.group_keys))
+        fields = self.step_fields
+        case_dict = {}
+        for group in groups:
+            case_dict[self.group_keys[group]] = [
+                {
+                    "index": int(self.row_labels[pos]),
+                    "步骤名称": fields['步骤名称'][pos],
+                    "步骤描述": fields['步骤描述'][pos],
+                    "预期结果": fields['预期结果'][pos],
+                }
+                for pos in self.group_rows(group)
+            ]
+        return case_dict
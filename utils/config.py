@@ -0,0 +1,103 @@
+# utils/config.py
+# 运行参数集中配置，各模块构造时以此为默认值，可按需在构造参数中覆盖
+
+# Excel 状态写回：累计多少条标记后批量保存一次工作簿
+EXCEL_FLUSH_EVERY = 20
+# Excel 状态写回：距上次保存超过多少秒后，下一次标记时触发保存
+EXCEL_FLUSH_INTERVAL = 30.0
+# Excel 状态写回：为 True 时只改写工作表中目标单元格（保留格式，其余内容原样复制），不支持的文件自动改为整体保存
+EXCEL_INPLACE_PATCH = True
+
+# Word 会话缓存：最多同时保持打开的文档数量
+WORD_CACHE_MAX_DOCS = 8
+# Word 会话缓存：缓存文档估算总字节数上限（超出后按最近最少使用淘汰并保存）
+WORD_CACHE_MAX_BYTES = 512 * 1024 * 1024
+# Word 写入方式："stream" 为追加式写入（正文和图片暂存在磁盘，保存时流式打包，内存占用与图片数量无关）；
+# "document" 为 python-docx 整体加载和保存
+WORD_WRITER = "stream"
+# 追加式写入的暂存目录（相对程序目录，文档保存并移出缓存后删除）
+WORD_STAGING_DIR = "Temp/docx_staging"
+
+# 截图后端：auto（优先 mss，不可用时 pyautogui）/ mss / pyautogui / replay（从目录回放图片）
+CAPTURE_BACKEND = "auto"
+# mss 截图的显示器：1 为主显示器（与原 pyautogui 在 Windows 上的全屏截图一致），2 起为其他显示器，
+# 0 为全部显示器拼成的整块虚拟屏幕（多屏时图片更大）
+CAPTURE_MONITOR = 1
+# replay 后端读取图片的目录
+CAPTURE_REPLAY_DIR = None
+
+# 截图编码：格式可选 png / jpeg / webp
+CAPTURE_FORMAT = "png"
+# PNG 压缩级别（0-9，越大越慢越小）
+PNG_COMPRESS_LEVEL = 1
+# JPEG 质量（1-95），启用 optimize
+JPEG_QUALITY = 90
+# WebP 无损压缩力度（0-6，越大越慢越小）
+WEBP_METHOD = 4
+# 后台编码线程数
+ENCODER_WORKERS = 2
+
+# Word 插图：图片在文档中的显示宽度（英寸）
+EMBED_WIDTH_INCHES = 5.5
+# Word 插图：按显示宽度重采样到的有效 DPI
+EMBED_DPI = 150
+# Word 插图：是否量化为 256 色调色板 PNG
+EMBED_QUANTIZE = False
+# Word 插图：单个报告的图片字节预算，None 表示不限制；接近预算时自动降低清晰度
+REPORT_SIZE_BUDGET = None
+# Word 插图：为 True 时直接插入原始全分辨率截图，不做预处理
+EMBED_ORIGINAL = False
+
+# 截图归档：为 True 时原始截图在后台编码存入截图存储，标注记录写在存储中的图片旁（JSON），便于重新编辑和导出
+ARCHIVE_CAPTURES = True
+# 截图存储目录（相对程序目录），按图片内容寻址，相同截图只保存一份
+IMAGE_STORE_DIR = "Temp/store"
+# 截图存储总大小上限，超出后按最近最少使用淘汰（未完成运行清单引用的截图除外）
+IMAGE_STORE_MAX_BYTES = 2 * 1024 * 1024 * 1024
+
+# 日志：最低输出级别 DEBUG / INFO / WARNING / ERROR，逐行明细属于 DEBUG
+LOG_LEVEL = "INFO"
+# 日志文件超过该大小后轮转
+LOG_MAX_BYTES = 5 * 1024 * 1024
+# 日志轮转保留的历史文件数
+LOG_BACKUP_COUNT = 3
+# 界面日志刷新间隔（毫秒）
+LOG_UI_INTERVAL_MS = 100
+# 界面日志最多保留行数
+LOG_UI_MAX_LINES = 1000
+
+# 批量生成：并行进程数，0 表示按 CPU 核数，1 表示在当前进程中串行生成
+BATCH_WORKERS = 0
+
+# 报告生成：为 True 时每张截图只追加一行运行清单，运行结束时在后台一次性生成 Word 并回写 Excel（需开启截图归档）；
+# 此时运行过程中 Excel 状态不会更新，要到运行结束（或退出）才统一写回
+DEFERRED_REPORTS = True
+# 运行结束时生成报告的并行进程数：打包的单文件 exe 每个工作进程都要重新解压，交互界面使用较小的固定值
+REPORT_WORKERS = 2
+# 运行结束时生成报告：涉及的用例数不超过该值时直接在当前进程中生成，不启动进程池
+REPORT_INPROCESS_CASES = 4
+# 运行清单目录（相对程序目录）
+MANIFEST_DIR = "logs/manifests"
+# 步骤版执行进度目录（相对程序目录），异常退出后从中断的步骤继续
+PROGRESS_DIR = "logs/progress"
+
+# 耗时统计：是否记录各阶段耗时（截图、标注、编码、Word、Excel）
+METRICS_ENABLED = True
+# 耗时统计：逐条记录文件（JSONL）与 Prometheus 文本文件（相对程序目录）
+TRACE_FILE = "logs/trace.jsonl"
+PROMETHEUS_FILE = "logs/metrics.prom"
+# 耗时统计：逐条记录文件超过该大小后轮转，保留的历史文件数
+TRACE_MAX_BYTES = 5 * 1024 * 1024
+TRACE_BACKUP_COUNT = 3
+# 耗时统计：控制面板中实时显示最近一次各阶段耗时
+METRICS_LIVE = True
+
+# 重复截图检测：同一用例相邻两张截图 dHash 汉明距离（共 64 位）不超过该值视为近似重复，None 关闭检测
+DUPLICATE_THRESHOLD = 4
+# 近似重复的处理：warn 仅在控制面板提示；reuse 复用上一张截图（不再编码归档，Word 中引用同一图片）
+DUPLICATE_POLICY = "warn"
+
+# 连拍模式初始状态：开启后 F8 只截图入队，标注与写入留到批量审阅（可在控制面板中切换）
+BURST_MODE = False
+# 连拍队列最多保留的未写入截图数，达到后拒绝新的截图（原图存入截图存储后内存中只保留缩略图）
+BURST_QUEUE_SIZE = 50
@@ -0,0 +1,351 @@
+# utils/docx_stream.py
+
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import zipfile
+from xml.sax.saxutils import escape
+from PIL import Image
+
+CHUNK_SIZE = 1024 * 1024
+STAGING_PREFIX = "docx_"
+LOCK_FILE = ".lock"
+# 打包时 XML 成员的压缩级别（图片本身已压缩，原样存入）
+COMPRESS_LEVEL = 6
+EMU_PER_INCH = 914400
+
+DOCUMENT_PART = "word/document.xml"
+RELS_PART = "word/_rels/document.xml.rels"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+IMAGE_REL_TYPE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/image"
+IMAGE_CONTENT_TYPES = {"png": "image/png", "jpeg": "image/jpeg", "gif": "image/gif", "bmp": "image/bmp"}
+
+BODY_START = re.compile(rb"<w:body\b[^>]*>")
+BODY_END = b"</w:body>"
+PARAGRAPH_END = re.compile(rb"</w:p>")
+SECT_PR = b"<w:sectPr"
+DOC_PR_ID = re.compile(rb'<wp:docPr\b[^>]*?\bid="(\d+)"')
+PICTURE_TAG = re.compile(rb"<pic:pic[ >]")
+REL = re.compile(rb"<Relationship\b[^>]*>")
+REL_ID = re.compile(r"^rId(\d+)$")
+MEDIA_NUMBER = re.compile(r"^word/media/image(\d+)\.")
+DEFAULT_EXTENSION = re.compile(rb'<Default\b[^>]*\bExtension="([^"]+)"')
+
+# 与 python-docx 插入的内联图片结构一致，命名空间就地声明以兼容根元素未声明的文档
+PICTURE_XML = (
+    '<w:p><w:r><w:drawing>'
+    '<wp:inline xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"'
+    ' distT="0" distB="0" distL="0" distR="0">'
+    '<wp:extent cx="{cx}" cy="{cy}"/><wp:effectExtent l="0" t="0" r="0" b="0"/>'
+    '<wp:docPr id="{doc_pr}" name="Picture {doc_pr}"/>'
+    '<wp:cNvGraphicFramePr><a:graphicFrameLocks xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main"'
+    ' noChangeAspect="1"/></wp:cNvGraphicFramePr>'
+    '<a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">'
+    '<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+    '<pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+    '<pic:nvPicPr><pic:cNvPr id="0" name="{name}"/><pic:cNvPicPr/></pic:nvPicPr>'
+    '<pic:blipFill><a:blip xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships"'
+    ' r:embed="{rel_id}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>'
+    '<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr>'
+    '</pic:pic></a:graphicData></a:graphic></wp:inline></w:drawing></w:r></w:p>'
+)
+
+
+def _attr(tag, name):
+    match = re.search(rb'\b' + name + rb'="([^"]*)"', tag)
+    return match.group(1).decode("utf-8") if match else None
+
+
+def _lock(handle):
+    # 非阻塞独占锁，已被其他进程（或本进程其他写入器）持有时抛出 OSError
+    if os.name == "nt":
+        import msvcrt
+        handle.seek(0)
+        msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _dir_size(path):
+    total = 0
+    for dirpath, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, filename))
+            except OSError:
+                pass
+    return total
+
+
+def orphaned_staging(staging_root):
+    """
+    返回异常退出遗留的暂存目录：写入器存活期间一直持有目录中的锁文件，能取得锁（或没有锁文件）即为遗留
+    """
+    if not os.path.isdir(staging_root):
+        return []
+    orphans = []
+    for name in sorted(os.listdir(staging_root)):
+        path = os.path.join(staging_root, name)
+        if not name.startswith(STAGING_PREFIX) or not os.path.isdir(path):
+            continue
+        try:
+            with open(os.path.join(path, LOCK_FILE), "ab") as handle:
+                _lock(handle)
+        except FileNotFoundError:
+            pass
+        except OSError:
+            continue
+        orphans.append(path)
+    return orphans
+
+
+def cleanup_staging(staging_root, logger=None):
+    """
+    删除遗留的暂存目录（每个都是一份完整的报告副本），返回 (删除个数, 释放字节数)
+    """
+    removed, freed = 0, 0
+    for path in orphaned_staging(staging_root):
+        size = _dir_size(path)
+        shutil.rmtree(path, ignore_errors=True)
+        if not os.path.exists(path):
+            removed += 1
+            freed += size
+    if removed and logger is not None:
+        logger.log(f"清理遗留的 Word 暂存目录 {removed} 个，释放 {freed / 1024 / 1024:.1f} MB")
+    return removed, freed
+
+
+class StreamingDocxWriter:
+    """
+    追加式 docx 写入器：正文 XML 和图片部件暂存在磁盘，新段落和图片只追加写入暂存区，
+    保存时流式打包为 docx（先写临时文件再替换）；不解析已有图片，内存占用与文档中的图片数量无关。
+    提供与 python-docx Document 相同的 add_paragraph / add_picture / save 接口
+    """
+
+    def __init__(self, source, staging_root):
+        """
+        source 为已有 docx 的路径或文件对象，staging_root 为暂存目录的上级目录
+        """
+        os.makedirs(staging_root, exist_ok=True)
+        self.staging_dir = tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=staging_root)
+        # 存活期间持有锁，清理时据此区分遗留目录和其他进程正在使用的目录
+        self._lock_handle = open(os.path.join(self.staging_dir, LOCK_FILE), "wb")
+        _lock(self._lock_handle)
+        self.parts_dir = os.path.join(self.staging_dir, "parts")
+        self.body_path = os.path.join(self.staging_dir, "body.xml")
+        self.pictures = 0
+
+        self._members = []  # 成员顺序，新图片追加在末尾
+        self._head = self._tail = b""
+        self._rels = self._content_types = b""
+        self._new_rels = []  # [(rId, Target)]
+        self._media = {}  # 图片数据 SHA1 -> rId，相同图片只保存一份
+        self._extensions = set()
+        self._next_rel = self._next_image = self._next_doc_pr = 1
+        try:
+            self._stage(source)
+            self._body = open(self.body_path, "ab")
+        except Exception:
+            self._lock_handle.close()
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            raise
+
+    def _part_path(self, name):
+        return os.path.join(self.parts_dir, *name.split("/"))
+
+    def _stage(self, source):
+        hashes = {}  # Target -> SHA1
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                name = info.filename
+                self._members.append(name)
+                if name == DOCUMENT_PART:
+                    with archive.open(info) as src:
+                        self._split_document(src)
+                elif name == RELS_PART:
+                    self._rels = archive.read(info)
+                elif name == CONTENT_TYPES_PART:
+                    self._content_types = archive.read(info)
+                elif not name.endswith("/"):
+                    path = self._part_path(name)
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    digest = hashlib.sha1()
+                    with archive.open(info) as src, open(path, "wb") as dst:
+                        while chunk := src.read(CHUNK_SIZE):
+                            digest.update(chunk)
+                            dst.write(chunk)
+                    match = MEDIA_NUMBER.match(name)
+                    if match:
+                        hashes[name[len("word/"):]] = digest.hexdigest()
+                        self._next_image = max(self._next_image, int(match.group(1)) + 1)
+        for part in (DOCUMENT_PART, RELS_PART, CONTENT_TYPES_PART):
+            if part not in self._members:
+                raise ValueError(f"不是有效的 docx 文件：缺少 {part}")
+
+        for rel in REL.findall(self._rels):
+            rel_id, target = _attr(rel, rb"Id"), _attr(rel, rb"Target")
+            match = REL_ID.match(rel_id or "")
+            if match:
+                self._next_rel = max(self._next_rel, int(match.group(1)) + 1)
+            if _attr(rel, rb"Type") == IMAGE_REL_TYPE and target in hashes:
+                self._media.setdefault(hashes[target], rel_id)
+
+    def _split_document(self, src):
+        """
+        分块读取 document.xml：<w:body> 之前为头部，正文内容写入暂存文件，
+        末尾的节属性 <w:sectPr> 与结束标签为尾部；同时统计已有图片数和最大 docPr 编号
+        """
+        buffer = b""
+        while True:
+            chunk = src.read(CHUNK_SIZE)
+            buffer += chunk
+            match = BODY_START.search(buffer)
+            if match:
+                self._head, buffer = buffer[:match.end()], buffer[match.end():]
+                break
+            if not chunk:
+                raise ValueError("document.xml 中没有 w:body")
+
+        with open(self.body_path, "wb") as body:
+            while True:
+                # 以段落结束标签为界写出，保证标签不会被分块截断
+                position = 0
+                for end in PARAGRAPH_END.finditer(buffer):
+                    position = end.end()
+                if position:
+                    self._scan(buffer[:position])
+                    body.write(buffer[:position])
+                    buffer = buffer[position:]
+                chunk = src.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                buffer += chunk
+
+            end = buffer.rfind(BODY_END)
+            if end < 0:
+                raise ValueError("document.xml 中没有 </w:body>")
+            split = buffer.rfind(SECT_PR, 0, end)
+            if split < 0:
+                split = end
+            self._scan(buffer[:split])
+            body.write(buffer[:split])
+            self._tail = buffer[split:]
+
+    def _scan(self, segment):
+        self.pictures += len(PICTURE_TAG.findall(segment))
+        for match in DOC_PR_ID.finditer(segment):
+            self._next_doc_pr = max(self._next_doc_pr, int(match.group(1)) + 1)
+
+    def add_paragraph(self, text=""):
+        """
+        追加一个普通段落（换行符转为软换行，制表符转为制表位）
+        """
+        if not text:
+            self._body.write(b"<w:p/>")
+            return
+        runs = []
+        for index, line in enumerate(text.split("\n")):
+            if index:
+                runs.append("<w:br/>")
+            for position, piece in enumerate(line.split("\t")):
+                if position:
+                    runs.append("<w:tab/>")
+                if piece:
+                    runs.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+        self._body.write(f"<w:p><w:r>{''.join(runs)}</w:r></w:p>".encode("utf-8"))
+
+    def add_picture(self, image, width=None):
+        """
+        追加一个只含图片的段落：image 为图片路径或文件对象（PNG / JPEG），width 为显示宽度（EMU，
+        可直接传 Inches(...)），高度按比例计算；相同图片数据只新增引用，不重复保存
+        """
+        if isinstance(image, str):
+            with open(image, "rb") as f:
+                data = f.read()
+        else:
+            data = image.read()
+        with Image.open(io.BytesIO(data)) as img:
+            pixel_width, pixel_height = img.size
+            extension = (img.format or "png").lower()
+            dpi = img.info.get("dpi", (72, 72))[0] or 72
+        if extension not in IMAGE_CONTENT_TYPES:
+            raise ValueError(f"不支持插入 {extension} 格式的图片")
+
+        digest = hashlib.sha1(data).hexdigest()
+        rel_id = self._media.get(digest)
+        if rel_id is None:
+            rel_id = f"rId{self._next_rel}"
+            target = f"media/image{self._next_image}.{extension}"
+            self._next_rel += 1
+            self._next_image += 1
+            path = self._part_path("word/" + target)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+            self._members.append("word/" + target)
+            self._new_rels.append((rel_id, target))
+            self._extensions.add(extension)
+            self._media[digest] = rel_id
+
+        cx = int(width) if width else int(pixel_width / float(dpi) * EMU_PER_INCH)
+        cy = int(round(cx * pixel_height / pixel_width))
+        doc_pr = self._next_doc_pr
+        self._next_doc_pr += 1
+        self._body.write(PICTURE_XML.format(cx=cx, cy=cy, doc_pr=doc_pr, name=f"image{doc_pr}.{extension}",
+                                            rel_id=rel_id).encode("utf-8"))
+        self.pictures += 1
+
+    def _rels_xml(self):
+        added = "".join(f'<Relationship Id="{rel_id}" Type="{IMAGE_REL_TYPE}" Target="{target}"/>'
+                        for rel_id, target in self._new_rels).encode("utf-8")
+        return self._rels.replace(b"</Relationships>", added + b"</Relationships>")
+
+    def _content_types_xml(self):
+        known = {extension.decode("utf-8").lower() for extension in DEFAULT_EXTENSION.findall(self._content_types)}
+        added = "".join(f'<Default Extension="{extension}" ContentType="{IMAGE_CONTENT_TYPES[extension]}"/>'
+                        for extension in sorted(self._extensions - known)).encode("utf-8")
+        return self._content_types.replace(b"</Types>", added + b"</Types>")
+
+    def save(self, path):
+        """
+        流式打包为 docx：正文按块从暂存文件复制，图片部件原样存入；先写临时文件再替换目标文件
+        """
+        self._body.flush()
+        tmp_path = f"{path}.writing"
+        try:
+            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL) as target:
+                for name in self._members:
+                    if name == CONTENT_TYPES_PART:
+                        target.writestr(name, self._content_types_xml())
+                    elif name == RELS_PART:
+                        target.writestr(name, self._rels_xml())
+                    elif name == DOCUMENT_PART:
+                        with target.open(name, "w") as dst, open(self.body_path, "rb") as body:
+                            dst.write(self._head)
+                            shutil.copyfileobj(body, dst, CHUNK_SIZE)
+                            dst.write(self._tail)
+                    elif not name.endswith("/"):
+                        info = zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0))
+                        info.compress_type = zipfile.ZIP_STORED if name.startswith("word/media/") \
+                            else zipfile.ZIP_DEFLATED
+                        with open(self._part_path(name), "rb") as src, \
+                                target.open(info, "w", force_zip64=True) as dst:
+                            shutil.copyfileobj(src, dst, CHUNK_SIZE)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def close(self):
+        """
+        删除暂存区（保存后调用；未保存的追加内容随之丢弃）
+        """
+        if not self._body.closed:
+            self._body.close()
+        self._lock_handle.close()
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
@@ -1,10 +1,16 @@
-import pandas as pd
 from openpyxl import load_workbook
 import os
+import threading
+import time
 from tkinter import filedialog, messagebox
+from utils import config
+from utils.case_index import CaseIndex
+from utils.metrics import tracer
+from utils.workbook_loader import load_sheet
+from utils.xlsx_patcher import XlsxPatchError, patch_cells
 
 class ExcelHandler:
-    def __init__(self, logger, input_dir, root):
+    def __init__(self, logger, input_dir, root, flush_every=None, flush_interval=None):
         self.logger = logger
         self.input_dir = input_dir
         self.file_path = None
@@ -12,13 +18,26 @@ class ExcelHandler:
         self.root = root
         self.version = "基础版"
         self.result_col_index = None
+        self._case_index = None
+
+        # 状态写回缓冲：标记先进入内存待写集合并追加到日志文件，按阈值批量保存
+        self.flush_every = flush_every if flush_every is not None else config.EXCEL_FLUSH_EVERY
+        self.flush_interval = flush_interval if flush_interval is not None else config.EXCEL_FLUSH_INTERVAL
+        self._pending_marks = set()
+        self._last_flush = time.monotonic()
+        self._lock = threading.RLock()
 
     def _show_error(self, msg: str):
+        if self.root is None:
+            # 无界面模式：错误已写入日志
+            return
         self.root.attributes('-topmost', True)
         messagebox.showerror("错误", msg, parent=self.root)
         self.root.attributes('-topmost', False)
 
     def _show_info(self, msg: str):
+        if self.root is None:
+            return
         self.root.attributes('-topmost', True)
         messagebox.showinfo("提示", msg, parent=self.root)
         self.root.attributes('-topmost', False)
@@ -54,9 +73,13 @@ class ExcelHandler:
             self.logger.log(f"选择Excel文件异常：{e}")
             return False
 
+    @tracer.timed("excel_load")
     def load_excel(self) -> bool:
+        self._case_index = None
+        self.result_col_index = None
         try:
-            self.df = pd.read_excel(self.file_path, header=0)
+            # 单次流式读取：同时得到数据和“测试结果”列号
+            self.df, self.result_col_index = load_sheet(self.file_path)
             self.logger.log(f"成功加载Excel文件：{os.path.basename(self.file_path)}")
         except Exception as e:
             self._show_error(f"读取Excel失败：{e}")
@@ -75,94 +98,143 @@ class ExcelHandler:
             self.logger.log("Excel列数不足3列")
             return False
 
-        try:
-            wb = load_workbook(self.file_path)
-            ws = wb.active
-            for i, cell in enumerate(ws[1], start=1):
-                if cell.value == "测试结果":
-                    self.result_col_index = i
-                    self.logger.log(f"检测到“测试结果”列在第 {i} 列")
-                    break
-            if self.result_col_index is None:
-                self._show_error("Excel中未找到“测试结果”列")
-                self.logger.log("Excel中未找到“测试结果”列")
-                return False
-        except Exception as e:
-            self._show_error(f"解析Excel列头失败：{e}")
-            self.logger.log(f"解析Excel列头失败：{e}")
+        if self.result_col_index is None:
+            self._show_error("Excel中未找到“测试结果”列")
+            self.logger.log("Excel中未找到“测试结果”列")
             return False
+        self.logger.log(f"检测到“测试结果”列在第 {self.result_col_index} 列")
+        # 测试结果列可能整列为空被识别为数值列，统一为 object 以便写入“已执行”
+        self.df['测试结果'] = self.df['测试结果'].astype(object)
 
+        self._replay_journal()
         return True
 
+    @property
+    def journal_path(self):
+        return f"{self.file_path}.journal" if self.file_path else None
+
+    def _replay_journal(self):
+        """
+        上次运行异常退出时，将日志文件中尚未写回的标记重新应用并保存
+        """
+        with self._lock:
+            self._pending_marks.clear()
+            self._last_flush = time.monotonic()
+            if not self.journal_path or not os.path.exists(self.journal_path):
+                return
+            try:
+                with open(self.journal_path, "r", encoding="utf-8") as f:
+                    indices = {int(line) for line in f if line.strip().isdigit()}
+            except Exception as e:
+                self.logger.log(f"读取状态日志失败：{e}")
+                return
+            for index in indices:
+                if index in self.df.index:
+                    self.df.at[index, '测试结果'] = "已执行"
+                    self._pending_marks.add(index)
+            self.logger.log(f"检测到未写回的状态日志，恢复 {len(self._pending_marks)} 条标记")
+            self.flush_status()
+
+    @property
+    def case_index(self):
+        if self._case_index is None:
+            self._case_index = CaseIndex(self.df)
+        return self._case_index
+
     def get_pending_cases(self):
+        # 逐行不输出日志：即使 DEBUG 被过滤，格式化消息本身的开销也远大于向量化查询
         self.logger.log("开始获取未执行用例")
+        index = self.case_index
 
         if self.version == "步骤版":
-            from collections import defaultdict
-            case_group = defaultdict(list)
-
-            last_test_name = ""
-            last_checkpoint = ""
-
-            # 分组：按测试名称+验证点
-            for idx, row in self.df.iterrows():
-                test_name = str(row['测试名称']).strip() if pd.notna(row['测试名称']) and row['测试名称'] != '' else last_test_name
-                checkpoint = str(row['验证点']).strip() if pd.notna(row['验证点']) and row['验证点'] != '' else last_checkpoint
-                last_test_name, last_checkpoint = test_name, checkpoint
-
-                key = (test_name, checkpoint)
-                status = str(row['测试结果']).strip().lower() if pd.notna(row['测试结果']) else ''
-                case_group[key].append((idx, status))
-
-            for (test_name, check_point), items in case_group.items():
-                all_status = [s for _, s in items]
-                if all(s in ['已执行', 'pass', 'passed'] for s in all_status):
-                    self.logger.log(f"用例已完成: {test_name}-{check_point}")
-                    continue
-                first_index = items[0][0]
-                self.logger.log(f"待执行用例: 行={first_index}, 用例名={test_name}, 验证点={check_point}")
-                yield first_index, test_name, check_point
+            for group in index.pending_groups().tolist():
+                test_name, check_point = index.group_keys[group]
+                yield int(index.row_labels[index.group_rows(group)[0]]), test_name, check_point
         else:
-            for idx, row in self.df.iterrows():
-                status = str(row['测试结果']).strip().lower() if pd.notna(row['测试结果']) else ''
-                if status not in ['已执行', 'pass', 'passed']:
-                    filename = str(row['测试名称']).strip() if pd.notna(row['测试名称']) else ''
-                    checkpoint = str(row['验证点']).strip() if pd.notna(row['验证点']) else ''
-                    self.logger.log(f"待执行用例: 行={idx}, 用例名={filename}, 验证点={checkpoint}")
-                    yield idx, filename, checkpoint
+            for pos in index.pending_rows():
+                yield int(index.row_labels[pos]), index.raw_names[pos], index.raw_checkpoints[pos]
 
     def mark_case_executed(self, index: int):
+        self.mark_cases_executed([index])
+
+    @tracer.timed("excel_mark")
+    def mark_cases_executed(self, indices):
+        """
+        标记若干行为“已执行”：更新内存并写入状态日志，达到阈值时批量写回工作簿
+        """
+        indices = list(indices)
+        if not indices:
+            return
         # 内存中DataFrame更新
-        self.df.at[index, '测试结果'] = "已执行"
-        try:
+        for index in indices:
+            self.df.at[index, '测试结果'] = "已执行"
+            if self._case_index is not None:
+                self._case_index.mark_done(index)
+        if self.result_col_index is None:
+            self._show_error("内部错误：测试结果列索引未初始化")
+            self.logger.log("错误：result_col_index 为 None，可能未正确加载 Excel")
+            return
+        with self._lock:
+            self._pending_marks.update(indices)
+            try:
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    f.write("".join(f"{index}\n" for index in indices))
+            except Exception as e:
+                self.logger.log(f"写入状态日志失败：{e}")
+            self.logger.debug(f"{len(indices)} 行状态已缓存，待写回 {len(self._pending_marks)} 条")
+
+            if (len(self._pending_marks) >= self.flush_every
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush_status()
+
+    @tracer.timed("excel_save")
+    def flush_status(self) -> bool:
+        """
+        将缓存的“已执行”标记一次性写回工作簿，成功后清空日志文件
+        """
+        with self._lock:
+            if not self._pending_marks:
+                return True
             if self.result_col_index is None:
-                self._show_error("内部错误：测试结果列索引未初始化")
-                self.logger.log("错误：result_col_index 为 None，可能未正确加载 Excel")
-                return
-            excel_row = index + 2  # DataFrame 第一行为表头
-            wb = load_workbook(self.file_path)
-            ws = wb.active
-            ws.cell(row=excel_row, column=self.result_col_index).value = "已执行"
-            wb.save(self.file_path)
-            self.logger.log(f"更新用例行 {excel_row} 状态为 已执行")
-        except PermissionError:
-            self._show_error("写入Excel失败，文件被占用或无权限。请关闭Excel后重试。")
-            self.logger.log("写入Excel失败，权限不足或文件被占用。")
-        except Exception as e:
-            self._show_error(f"写入Excel失败：{e}")
-            self.logger.log(f"写入Excel失败：{e}")
-
-    def get_step_cases(self):
-        from collections import defaultdict
-        case_dict = defaultdict(list)
-        for idx, row in self.df.iterrows():
-            if pd.notna(row['测试名称']) or pd.notna(row['验证点']):
-                current_test = str(row['测试名称']).strip()
-                current_check = str(row['验证点']).strip()
-            case_dict[(current_test, current_check)].append({
-                "index": idx,
-                "步骤名称": str(row['步骤名称']).strip() if pd.notna(row['步骤名称']) else "",
-                "步骤描述": str(row['步骤描述']).strip() if pd.notna(row['步骤描述']) else "",
-                "预期结果": str(row['预期结果']).strip() if pd.notna(row['预期结果']) else ""
-            })
-        return case_dict
\ No newline at end of file
+                self.logger.log("错误：result_col_index 为 None，无法写回状态")
+                return False
+            try:
+                # DataFrame 第一行为表头
+                values = {(index + 2, self.result_col_index): "已执行" for index in sorted(self._pending_marks)}
+                if not self._patch_cells(values):
+                    wb = load_workbook(self.file_path)
+                    ws = wb.active
+                    for (row, column), value in values.items():
+                        ws.cell(row=row, column=column).value = value
+                    wb.save(self.file_path)
+                self.logger.log(f"批量写回 {len(self._pending_marks)} 条用例状态为 已执行")
+                self._pending_marks.clear()
+                self._last_flush = time.monotonic()
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                return True
+            except PermissionError:
+                self._show_error("写入Excel失败，文件被占用或无权限。请关闭Excel后重试。")
+                self.logger.log("写入Excel失败，权限不足或文件被占用。")
+            except Exception as e:
+                self._show_error(f"写入Excel失败：{e}")
+                self.logger.log(f"写入Excel失败：{e}")
+            self._last_flush = time.monotonic()
+            return False
+
+    def _patch_cells(self, values) -> bool:
+        """
+        只改写工作表中目标单元格（保留格式，其余内容原样复制）；结构不支持时返回 False，由调用方整体保存
+        """
+        if not config.EXCEL_INPLACE_PATCH:
+            return False
+        try:
+            patch_cells(self.file_path, values)
+            return True
+        except XlsxPatchError as e:
+            self.logger.log(f"原地写回不可用，改为整体保存工作簿：{e}", "WARNING")
+            return False
+
+    def get_step_cases(self, pending_only=False):
+        index = self.case_index
+        return index.step_cases(index.pending_groups() if pending_only else None)
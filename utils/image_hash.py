@@ -0,0 +1,33 @@
+# utils/image_hash.py
+
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 8
+
+
+def dhash(image, size=HASH_SIZE):
+    """
+    差值哈希（dHash）：缩小为 (size+1)x size 灰度图，比较相邻像素亮度，返回 size*size 位整数
+    """
+    # 先整数倍缩小再求均值，4K 截图约 10 ms
+    small = image.resize((size + 1, size), Image.Resampling.BOX, reducing_gap=2.0).convert("L")
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    """
+    两个哈希值的汉明距离（不同的位数）
+    """
+    return (a ^ b).bit_count()
+
+
+def is_similar(a, b, threshold):
+    """
+    汉明距离不超过阈值视为近似重复；任一哈希缺失或阈值为 None 时返回 False
+    """
+    if a is None or b is None or threshold is None:
+        return False
+    return hamming(a, b) <= threshold
@@ -0,0 +1,216 @@
+# utils/image_store.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from utils import config
+from utils.annotations import save_sidecar, sidecar_path
+from utils.path_utils import get_base_path
+from utils.run_manifest import RunManifest
+
+INDEX_FILE = "index.json"
+OBJECTS_DIR = "objects"
+
+
+def image_digest(image):
+    """
+    按像素内容计算图片摘要（与编码格式无关），相同画面得到相同的键
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image.mode}:{image.width}x{image.height}:".encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+class ImageStore:
+    """
+    按内容寻址的截图存储：对象存放在 objects/<前两位>/<摘要><扩展名>，相同截图只保存一份，
+    标注记录写在同目录的 <摘要>.json（随对象一起淘汰）；
+    index.json 记录每个对象的大小和最近使用时间，总大小超过上限时按最近最少使用淘汰，
+    未完成运行清单引用的图片不会被淘汰
+    """
+
+    def __init__(self, logger, root_dir=None, max_bytes=None, manifest_dir=None):
+        self.logger = logger
+        self.root_dir = root_dir or os.path.join(get_base_path(), config.IMAGE_STORE_DIR)
+        self.max_bytes = max_bytes if max_bytes is not None else config.IMAGE_STORE_MAX_BYTES
+        self.manifest_dir = manifest_dir or os.path.join(get_base_path(), config.MANIFEST_DIR)
+        self.index_path = os.path.join(self.root_dir, INDEX_FILE)
+        os.makedirs(os.path.join(self.root_dir, OBJECTS_DIR), exist_ok=True)
+        self._lock = threading.RLock()
+        self._index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, separators=(",", ":"))
+        os.replace(tmp_path, self.index_path)
+
+    def object_path(self, name):
+        return os.path.join(self.root_dir, OBJECTS_DIR, name[:2], name)
+
+    def total_bytes(self):
+        with self._lock:
+            return sum(entry["size"] for entry in self._index.values())
+
+    def put(self, image, encoder):
+        """
+        存入截图并返回对象路径：已存在时只更新使用时间，否则用 encoder 编码写入（先写临时文件再改名）
+        """
+        name = image_digest(image) + encoder.extension
+        path = self.object_path(name)
+        with self._lock:
+            if name in self._index and os.path.exists(path):
+                self._index[name]["last_used"] = time.time()
+                self._save_index()
+                self.logger.log(f"截图已存在于存储中，复用：{name}")
+                return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.part"
+        encoder.encode(image, tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._index[name] = {"size": os.path.getsize(path), "last_used": time.time()}
+            self._save_index()
+            if self.total_bytes() > self.max_bytes:
+                self.evict(keep={name})
+        return path
+
+    def save_annotations(self, path, size, annotations):
+        """
+        在存储中的图片旁写入标注 JSON（同一图片被多次使用时保留最近一次的标注），返回文件路径
+        """
+        with self._lock:
+            return save_sidecar(path, size, annotations)
+
+    def _remove_object(self, name):
+        for path in (self.object_path(name), sidecar_path(self.object_path(name))):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def pinned(self):
+        """
+        未完成运行清单引用的对象名（这些截图还要用于生成报告）
+        """
+        names = set()
+        for manifest in RunManifest.unfinished(self.manifest_dir):
+            for shot in manifest.shots():
+                names.add(os.path.basename(shot["image"]))
+        return names
+
+    def evict(self, max_bytes=None, keep=()):
+        """
+        按最近最少使用淘汰对象，直到总大小不超过上限；返回 (淘汰个数, 释放字节数)
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            total = self.total_bytes()
+            if total <= max_bytes:
+                return 0, 0
+            protected = self.pinned() | set(keep)
+            removed, freed = 0, 0
+            for name, entry in sorted(self._index.items(), key=lambda item: item[1]["last_used"]):
+                if total <= max_bytes:
+                    break
+                if name in protected:
+                    continue
+                self._remove_object(name)
+                del self._index[name]
+                total -= entry["size"]
+                removed += 1
+                freed += entry["size"]
+            self._save_index()
+        if removed:
+            self.logger.log(f"截图存储淘汰 {removed} 张，释放 {freed / 1024 / 1024:.1f} MB，"
+                            f"当前 {total / 1024 / 1024:.1f} MB")
+        if total > max_bytes:
+            self.logger.log(f"截图存储仍超出上限：未完成的用例引用了 {total / 1024 / 1024:.1f} MB 截图", "WARNING")
+        return removed, freed
+
+    def _scan_objects(self):
+        # 返回 (图片对象, 标注文件)，均为 {文件名: (路径, 大小)}
+        objects, sidecars = {}, {}
+        objects_dir = os.path.join(self.root_dir, OBJECTS_DIR)
+        for dirpath, _, filenames in os.walk(objects_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                found = sidecars if filename.endswith(".json") else objects
+                found[filename] = (path, os.path.getsize(path))
+        return objects, sidecars
+
+    def report(self, legacy_dir=None):
+        """
+        统计存储使用情况：对象数、总字节、被引用（不可淘汰）的字节、索引外的孤立文件和旧版 Temp 截图
+        """
+        with self._lock:
+            pinned = self.pinned()
+            objects, _ = self._scan_objects()
+            indexed = {name: entry for name, entry in self._index.items() if name in objects}
+            stats = {
+                "objects": len(indexed),
+                "bytes": sum(entry["size"] for entry in indexed.values()),
+                "pinned_bytes": sum(entry["size"] for name, entry in indexed.items() if name in pinned),
+                "max_bytes": self.max_bytes,
+                "orphans": len(objects) - len(indexed),
+                "orphan_bytes": sum(size for name, (_, size) in objects.items() if name not in indexed),
+                "missing": len(self._index) - len(indexed),
+            }
+        legacy = self._legacy_files(legacy_dir)
+        stats["legacy_files"] = len(legacy)
+        stats["legacy_bytes"] = sum(os.path.getsize(path) for path in legacy)
+        return stats
+
+    def _legacy_files(self, legacy_dir):
+        # 旧版本直接写在 Temp 目录下的截图与标注文件
+        if not legacy_dir or not os.path.isdir(legacy_dir):
+            return []
+        return [os.path.join(legacy_dir, filename) for filename in os.listdir(legacy_dir)
+                if os.path.isfile(os.path.join(legacy_dir, filename))]
+
+    def compact(self, legacy_dir=None):
+        """
+        整理存储：删除孤立文件、未写完的临时文件和图片已不存在的标注文件，清理索引中已丢失的对象，按上限淘汰，
+        并删除未被未完成运行清单引用的旧版 Temp 截图；返回释放的字节数
+        """
+        freed = 0
+        with self._lock:
+            objects, sidecars = self._scan_objects()
+            for name, (path, size) in objects.items():
+                if name not in self._index:
+                    os.remove(path)
+                    freed += size
+            stems = {os.path.splitext(name)[0] for name in self._index if name in objects}
+            for name, (path, size) in sidecars.items():
+                if os.path.splitext(name)[0] not in stems:
+                    os.remove(path)
+                    freed += size
+            for name in [name for name in self._index if name not in objects]:
+                del self._index[name]
+            self._save_index()
+            _, evicted = self.evict()
+            freed += evicted
+
+        legacy_pinned = set()
+        for manifest in RunManifest.unfinished(self.manifest_dir):
+            for shot in manifest.shots():
+                image = os.path.abspath(shot["image"])
+                legacy_pinned.update((image, sidecar_path(image)))
+        for path in self._legacy_files(legacy_dir):
+            if os.path.abspath(path) in legacy_pinned:
+                continue
+            freed += os.path.getsize(path)
+            os.remove(path)
+        self.logger.log(f"截图存储整理完成，释放 {freed / 1024 / 1024:.1f} MB")
+        return freed
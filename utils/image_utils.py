@@ -0,0 +1,51 @@
+# utils/image_utils.py
+
+import io
+from PIL import Image
+
+
+def fit_width(image, max_width):
+    """
+    宽度超过 max_width 时按比例缩小，否则原样返回
+    """
+    if image.width <= max_width:
+        return image
+    height = max(1, round(image.height * max_width / image.width))
+    return image.resize((max_width, height), Image.LANCZOS, reducing_gap=2.0)
+
+
+def budget_settings(used_bytes, budget, dpi, quantize):
+    """
+    按报告已用字节占预算的比例逐级降低清晰度，返回 (dpi, quantize, 格式)
+    """
+    if not budget:
+        return dpi, quantize, "png"
+    ratio = used_bytes / budget
+    if ratio < 0.5:
+        return dpi, quantize, "png"
+    if ratio < 0.8:
+        return int(dpi * 0.75), True, "png"
+    return int(dpi * 0.5), False, "jpeg"
+
+
+def prepare_for_embed(image, width_inches, dpi, quantize=False, fmt="png", jpeg_quality=75):
+    """
+    将图片重采样到插入位置所需的像素宽度并编码，返回内存中的图片流
+    image 可以是文件路径或 PIL 图片；width_inches 为 None 时保持原始分辨率
+    """
+    if not isinstance(image, Image.Image):
+        with Image.open(image) as src:
+            src.load()
+            image = src.copy()
+    if width_inches is not None:
+        image = fit_width(image, round(width_inches * dpi))
+
+    buffer = io.BytesIO()
+    if fmt == "jpeg":
+        image.convert("RGB").save(buffer, "JPEG", quality=jpeg_quality, optimize=True)
+    else:
+        if quantize:
+            image = image.convert("RGB").quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+        image.save(buffer, "PNG", optimize=quantize, dpi=(dpi, dpi))
+    buffer.seek(0)
+    return buffer
@@ -2,32 +2,121 @@ import tkinter as tk
 from tkinter.scrolledtext import ScrolledText
 import datetime
 import os
-import sys
+import queue
+import threading
+from utils import config
 from utils.path_utils import get_base_path
 
+LEVELS = {"DEBUG": 10, "INFO": 20, "WARNING": 30, "ERROR": 40}
+
+
+def rotate_file(path, backup_count):
+    """
+    按 path.1 ... path.N 轮转文件，保留 backup_count 个历史文件（为 0 时直接删除）
+    """
+    for i in range(backup_count - 1, 0, -1):
+        src = f"{path}.{i}"
+        if os.path.exists(src):
+            os.replace(src, f"{path}.{i + 1}")
+    if backup_count > 0:
+        os.replace(path, f"{path}.1")
+    else:
+        os.remove(path)
+
+
 class Logger:
-    def __init__(self, root, log_file="logs/output.log"):
+    """
+    非阻塞日志：消息进入队列，后台线程批量追加写文件（按大小轮转），
+    界面由主线程通过 root.after 定时批量刷新；root 为 None 时仅写文件
+    """
+
+    def __init__(self, root, log_file="logs/output.log", level=None, max_bytes=None, backup_count=None):
         self.root = root
         base_path = get_base_path()
         self.log_path = os.path.join(base_path, log_file)
         os.makedirs(os.path.dirname(self.log_path), exist_ok=True)
+        self.level = LEVELS[(level or config.LOG_LEVEL).upper()]
+        self.max_bytes = max_bytes if max_bytes is not None else config.LOG_MAX_BYTES
+        self.backup_count = backup_count if backup_count is not None else config.LOG_BACKUP_COUNT
 
-        self.text_area = ScrolledText(root, height=6)
-        self.text_area.pack(fill="x", padx=10, pady=10)
-        self.text_area.configure(state="disabled")
+        self._file_queue = queue.Queue()
+        self._writer = threading.Thread(target=self._write_loop, name="logger-writer", daemon=True)
+        self._writer.start()
 
-    def log(self, msg):
+        self.text_area = None
+        if root is not None:
+            self._ui_queue = queue.Queue()
+            self.text_area = ScrolledText(root, height=6)
+            self.text_area.pack(fill="x", padx=10, pady=10)
+            self.text_area.configure(state="disabled")
+            self.root.after(config.LOG_UI_INTERVAL_MS, self._drain_ui)
+
+    def log(self, msg, level="INFO"):
+        if LEVELS[level] < self.level:
+            return
         timestamp = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        full_msg = f"[{timestamp}] {msg}"
+        full_msg = f"[{timestamp}] {msg}" if level == "INFO" else f"[{timestamp}] [{level}] {msg}"
+        self._file_queue.put(full_msg)
+        if self.text_area is not None:
+            self._ui_queue.put(full_msg)
 
-        self.text_area.configure(state="normal")
-        self.text_area.insert(tk.END, full_msg + '\n')
-        self.text_area.configure(state="disabled")
-        self.text_area.yview(tk.END)
+    def debug(self, msg):
+        self.log(msg, "DEBUG")
 
+    def _drain_ui(self):
+        # 主线程中执行：一次取出队列中全部消息，合并插入
+        lines = []
+        try:
+            while True:
+                lines.append(self._ui_queue.get_nowait())
+        except queue.Empty:
+            pass
         try:
-            with open(self.log_path, "a", encoding="utf-8") as f:
-                f.write(full_msg + "\n")
-        except Exception:
-            # 避免写文件异常阻断程序，忽略
-            pass
\ No newline at end of file
+            if lines:
+                self.text_area.configure(state="normal")
+                self.text_area.insert(tk.END, "\n".join(lines) + "\n")
+                excess = int(self.text_area.index("end-1c").split(".")[0]) - config.LOG_UI_MAX_LINES
+                if excess > 0:
+                    self.text_area.delete("1.0", f"{excess + 1}.0")
+                self.text_area.configure(state="disabled")
+                self.text_area.yview(tk.END)
+            self.root.after(config.LOG_UI_INTERVAL_MS, self._drain_ui)
+        except tk.TclError:
+            # 窗口已销毁
+            pass
+
+    def _write_loop(self):
+        f = None
+        while True:
+            lines = [self._file_queue.get()]
+            try:
+                while True:
+                    lines.append(self._file_queue.get_nowait())
+            except queue.Empty:
+                pass
+            stop = None in lines
+            lines = [line for line in lines if line is not None]
+            try:
+                if f is None:
+                    f = open(self.log_path, "a", encoding="utf-8")
+                if lines:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                if self.max_bytes and f.tell() >= self.max_bytes:
+                    f.close()
+                    f = None
+                    rotate_file(self.log_path, self.backup_count)
+            except Exception:
+                # 避免写文件异常阻断程序，忽略
+                f = None
+            if stop:
+                if f is not None:
+                    f.close()
+                return
+
+    def close(self, timeout=2.0):
+        """
+        写完队列中剩余日志后停止后台线程（程序退出时调用）
+        """
+        self._file_queue.put(None)
+        self._writer.join(timeout)
@@ -0,0 +1,203 @@
+# utils/metrics.py
+
+import datetime
+import functools
+import json
+import math
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from utils import config
+from utils.logger import rotate_file
+from utils.path_utils import get_base_path
+
+
+def percentile(values, q):
+    """
+    最近秩法分位数，values 需已排序
+    """
+    if not values:
+        return 0.0
+    rank = max(1, math.ceil(q * len(values)))
+    return values[rank - 1]
+
+
+class Tracer:
+    """
+    轻量阶段耗时记录：每个阶段一条 JSONL 记录（进入队列，由后台线程批量追加写文件并按大小轮转），
+    汇总为 p50/p95 并导出 Prometheus 文本文件
+    """
+
+    def __init__(self, enabled=None, trace_path=None, prom_path=None, max_bytes=None, backup_count=None):
+        self.enabled = enabled if enabled is not None else config.METRICS_ENABLED
+        self._trace_path = trace_path
+        self._prom_path = prom_path
+        self.max_bytes = max_bytes if max_bytes is not None else config.TRACE_MAX_BYTES
+        self.backup_count = backup_count if backup_count is not None else config.TRACE_BACKUP_COUNT
+        self._durations = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+        # 首次记录时启动写文件线程
+        self._queue = queue.Queue()
+        self._writer = None
+
+    @property
+    def trace_path(self):
+        if self._trace_path is None:
+            self._trace_path = os.path.join(get_base_path(), config.TRACE_FILE)
+        return self._trace_path
+
+    @property
+    def prom_path(self):
+        if self._prom_path is None:
+            self._prom_path = os.path.join(get_base_path(), config.PROMETHEUS_FILE)
+        return self._prom_path
+
+    def add_listener(self, callback):
+        """
+        注册回调 callback(阶段名, 秒)，每条记录后在记录线程中调用；记录线程可能持有 Word / Excel 等锁，
+        回调只应做入队等轻量操作，不能等待界面主线程
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start, **attrs)
+
+    def timed(self, name):
+        """
+        方法装饰器：记录整个调用的耗时
+        """
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, seconds, **attrs):
+        if not self.enabled:
+            return
+        line = json.dumps({"ts": datetime.datetime.now().isoformat(timespec="milliseconds"), "stage": name,
+                           "ms": round(seconds * 1000, 2), "pid": os.getpid(), **attrs},
+                          ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._durations.setdefault(name, []).append(seconds)
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="trace-writer", daemon=True)
+                self._writer.start()
+        self._queue.put(line)
+        for callback in list(self._listeners):
+            try:
+                callback(name, seconds)
+            except Exception:
+                pass
+
+    def _write_loop(self):
+        f = None
+        while True:
+            lines = [self._queue.get()]
+            try:
+                while True:
+                    lines.append(self._queue.get_nowait())
+            except queue.Empty:
+                pass
+            stop = None in lines
+            lines = [line for line in lines if line is not None]
+            try:
+                if f is None:
+                    os.makedirs(os.path.dirname(self.trace_path), exist_ok=True)
+                    f = open(self.trace_path, "a", encoding="utf-8")
+                if lines:
+                    f.write("\n".join(lines) + "\n")
+                    f.flush()
+                if self.max_bytes and f.tell() >= self.max_bytes:
+                    f.close()
+                    f = None
+                    rotate_file(self.trace_path, self.backup_count)
+            except Exception:
+                # 统计失败不影响主流程
+                f = None
+            if stop:
+                if f is not None:
+                    f.close()
+                return
+
+    def close(self, timeout=2.0):
+        """
+        写完队列中剩余记录后停止后台线程（程序退出时调用），之后再有记录时重新启动
+        """
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join(timeout)
+
+    def summary(self):
+        """
+        返回 {阶段: {"count", "p50", "p95", "total"}}（秒）
+        """
+        with self._lock:
+            durations = {name: sorted(values) for name, values in self._durations.items()}
+        return {
+            name: {"count": len(values), "p50": percentile(values, 0.5), "p95": percentile(values, 0.95),
+                   "total": sum(values)}
+            for name, values in durations.items()
+        }
+
+    def write_prometheus(self):
+        """
+        以 Prometheus textfile 格式写出各阶段耗时汇总
+        """
+        lines = [
+            "# HELP screenshot_to_word_stage_seconds Duration of screenshot-to-word pipeline stages.",
+            "# TYPE screenshot_to_word_stage_seconds summary",
+        ]
+        for name, stats in sorted(self.summary().items()):
+            label = f'stage="{name}"'
+            lines.append(f'screenshot_to_word_stage_seconds{{{label},quantile="0.5"}} {stats["p50"]:.6f}')
+            lines.append(f'screenshot_to_word_stage_seconds{{{label},quantile="0.95"}} {stats["p95"]:.6f}')
+            lines.append(f'screenshot_to_word_stage_seconds_sum{{{label}}} {stats["total"]:.6f}')
+            lines.append(f'screenshot_to_word_stage_seconds_count{{{label}}} {stats["count"]}')
+        try:
+            os.makedirs(os.path.dirname(self.prom_path), exist_ok=True)
+            tmp_path = self.prom_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            os.replace(tmp_path, self.prom_path)
+        except Exception:
+            pass
+
+    def log_summary(self, logger):
+        """
+        输出本次运行各阶段 p50/p95 并导出 Prometheus 文件
+        """
+        summary = self.summary()
+        if not summary:
+            return
+        for name, stats in sorted(summary.items()):
+            logger.log(f"阶段耗时 {name}：{stats['count']} 次，p50 {stats['p50'] * 1000:.0f} ms，"
+                       f"p95 {stats['p95'] * 1000:.0f} ms")
+        self.write_prometheus()
+
+    def reset(self):
+        """
+        清空已记录的耗时（每次运行输出统计后调用，下一次运行重新统计）
+        """
+        with self._lock:
+            self._durations.clear()
+
+
+# 进程内共用的记录器
+tracer = Tracer()
@@ -0,0 +1,87 @@
+# utils/progress_journal.py
+
+import hashlib
+import json
+import os
+import threading
+
+
+class ProgressJournal:
+    """
+    步骤版执行进度（JSONL）：每完成或跳过一个步骤追加一行，记录步骤序号、行号、截图和插入后文档中的图片序号，
+    异常退出后据此从中断的步骤继续，已写入文档的步骤不再重复截图和插入
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._steps = {}  # (测试名称, 验证点) -> {步骤序号: 记录}
+        self._load()
+
+    @classmethod
+    def for_workbook(cls, progress_dir, workbook_path):
+        os.makedirs(progress_dir, exist_ok=True)
+        workbook = os.path.abspath(workbook_path)
+        stem = os.path.splitext(os.path.basename(workbook))[0]
+        digest = hashlib.blake2b(workbook.encode("utf-8"), digest_size=4).hexdigest()
+        return cls(os.path.join(progress_dir, f"{stem}_{digest}.jsonl"))
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # 异常退出可能留下不完整的最后一行
+                    continue
+                self._steps.setdefault((record["case"], record["checkpoint"]), {})[record["step"]] = record
+
+    def record_step(self, case, checkpoint, step, row, image=None, doc_position=None, skipped=False):
+        """
+        记录一个步骤：image 为截图在存储中的路径，doc_position 为插入后文档中的图片数（延后生成时为 None）
+        """
+        record = {"case": case, "checkpoint": checkpoint, "step": step, "row": int(row), "image": image,
+                  "doc": doc_position}
+        if skipped:
+            record["skipped"] = True
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            self._steps.setdefault((case, checkpoint), {})[step] = record
+
+    def has(self, case, checkpoint):
+        return (case, checkpoint) in self._steps
+
+    def resume(self, case, checkpoint, doc_pictures=None, executed=()):
+        """
+        返回 (续跑的步骤序号, 已截图步骤的行号列表)：从第 1 步起连续的、有进度记录或在工作簿中已执行（executed 为
+        这些步骤序号）的步骤视为已完成；进度记录的图片序号超过文档实际图片数（文档未保存即中断）时，
+        该步骤及之后的步骤需要重做
+        """
+        steps = self._steps.get((case, checkpoint), {})
+        step, rows = 0, []
+        while True:
+            record = steps.get(step)
+            if record is None:
+                # 没有进度记录的步骤（如上次按工作簿状态续跑时跳过的开头几步）以工作簿状态为准
+                if step not in executed:
+                    break
+            else:
+                if record.get("doc") is not None and doc_pictures is not None and record["doc"] > doc_pictures:
+                    break
+                if not record.get("skipped"):
+                    rows.append(record["row"])
+            step += 1
+        return step, rows
+
+    def clear(self):
+        """
+        全部用例执行完毕后删除进度文件
+        """
+        with self._lock:
+            self._steps.clear()
+            if os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,143 @@
+# utils/run_manifest.py
+
+import datetime
+import json
+import os
+import threading
+
+# 已生成完报告的清单移入该子目录（仍可手动回放），恢复和截图存储淘汰时不再扫描
+ARCHIVE_DIR = "built"
+
+
+class RunManifest:
+    """
+    运行清单（JSONL）：每完成一张截图追加一行记录，运行结束时据此一次性生成报告；
+    记录类型：start（工作簿信息）、shot（截图）、case_built（该用例文档已生成）、built（全部生成完成）；
+    全部生成完成后清单移入 built 子目录；文件只解析一次，之后的写入同步追加到内存中的记录
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._records = None
+
+    @classmethod
+    def create(cls, manifest_dir, workbook_path):
+        os.makedirs(manifest_dir, exist_ok=True)
+        stem = os.path.splitext(os.path.basename(workbook_path))[0]
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        manifest = cls(os.path.join(manifest_dir, f"{stem}_{timestamp}.jsonl"))
+        manifest._write({"event": "start", "workbook": os.path.abspath(workbook_path)})
+        return manifest
+
+    @classmethod
+    def unfinished(cls, manifest_dir, workbook_path=None):
+        """
+        返回尚未生成完报告的清单（可指定只查找某个工作簿的），用于异常退出后的恢复；
+        每个文件只解析一次，遇到已生成完但未归档的清单（旧版本遗留）时顺便归档
+        """
+        if not os.path.isdir(manifest_dir):
+            return []
+        workbook = os.path.abspath(workbook_path) if workbook_path else None
+        manifests = []
+        for filename in sorted(os.listdir(manifest_dir)):
+            if not filename.endswith(".jsonl"):
+                continue
+            manifest = cls(os.path.join(manifest_dir, filename))
+            if manifest.is_built():
+                manifest.archive()
+                continue
+            if not manifest.shots():
+                continue
+            if workbook and manifest.workbook() != workbook:
+                continue
+            manifests.append(manifest)
+        return manifests
+
+    def _write(self, record):
+        record.setdefault("ts", datetime.datetime.now().isoformat(timespec="seconds"))
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+            if self._records is not None:
+                self._records.append(record)
+
+    def append(self, case, checkpoint, step_note, image, row, annotations=None):
+        """
+        记录一张截图及其标注；annotations 为 None 时生成报告时读取图片旁的标注文件
+        """
+        record = {"event": "shot", "case": case, "checkpoint": checkpoint, "step_note": step_note,
+                  "image": image, "row": int(row)}
+        if annotations is not None:
+            record["annotations"] = annotations
+        self._write(record)
+
+    def mark_case_built(self, case):
+        self._write({"event": "case_built", "case": case})
+
+    def mark_built(self):
+        self._write({"event": "built"})
+        self.archive()
+
+    def archive(self):
+        """
+        移入 built 子目录（已在其中时不动），移动失败时保留原处，下次扫描时再试
+        """
+        manifest_dir = os.path.dirname(os.path.abspath(self.path))
+        if os.path.basename(manifest_dir) == ARCHIVE_DIR:
+            return
+        archive_dir = os.path.join(manifest_dir, ARCHIVE_DIR)
+        target = os.path.join(archive_dir, os.path.basename(self.path))
+        with self._lock:
+            try:
+                os.makedirs(archive_dir, exist_ok=True)
+                os.replace(self.path, target)
+                self.path = target
+            except OSError:
+                pass
+
+    def discard(self):
+        """
+        删除没有截图记录的清单（本次运行未截图）
+        """
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            self._records = []
+
+    def records(self):
+        with self._lock:
+            if self._records is None:
+                self._records = self._read()
+            return list(self._records)
+
+    def _read(self):
+        records = []
+        if not os.path.exists(self.path):
+            return records
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # 异常退出可能留下不完整的最后一行
+                    continue
+        return records
+
+    def workbook(self):
+        for record in self.records():
+            if record.get("event") == "start":
+                return record.get("workbook")
+        return None
+
+    def shots(self):
+        return [record for record in self.records() if record.get("event") == "shot"]
+
+    def built_cases(self):
+        return {record["case"] for record in self.records() if record.get("event") == "case_built"}
+
+    def is_built(self):
+        return any(record.get("event") == "built" for record in self.records())
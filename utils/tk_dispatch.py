@@ -0,0 +1,67 @@
+# utils/tk_dispatch.py
+
+import threading
+import tkinter as tk
+from collections import deque
+from concurrent.futures import Future
+
+
+class MainThreadDispatcher:
+    """
+    将后台线程中的界面操作转交给 Tk 主线程执行：任务进入队列，队列由空变为非空时
+    通过 after(0) 唤醒主线程事件循环取出全部任务执行，结果通过 Future 返回；空闲时不轮询
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self._scheduled = False
+
+    @classmethod
+    def for_root(cls, root):
+        """
+        每个 Tk 根窗口共用一个调度器
+        """
+        dispatcher = getattr(root, "_main_thread_dispatcher", None)
+        if dispatcher is None:
+            dispatcher = cls(root)
+            root._main_thread_dispatcher = dispatcher
+        return dispatcher
+
+    def call(self, fn, *args, **kwargs):
+        """
+        提交任务，返回 Future；只能在后台线程中等待其结果，主线程等待会死锁
+        """
+        future = Future()
+        with self._lock:
+            self._queue.append((fn, args, kwargs, future))
+            schedule = not self._scheduled
+            self._scheduled = True
+        if schedule:
+            try:
+                self.root.after(0, self._drain)
+            except (tk.TclError, RuntimeError) as e:
+                # 主窗口已销毁或事件循环已结束：队列中的任务不会再执行
+                self._fail_pending(e)
+        return future
+
+    def _drain(self):
+        with self._lock:
+            tasks, self._queue = self._queue, deque()
+            self._scheduled = False
+        for fn, args, kwargs, future in tasks:
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _fail_pending(self, error):
+        with self._lock:
+            tasks, self._queue = self._queue, deque()
+            self._scheduled = False
+        for _, _, _, future in tasks:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
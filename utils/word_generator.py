@@ -1,51 +1,291 @@
 # utils/word_generator.py
 
+import io
+import json
 import os
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict
 from docx import Document
 from docx.shared import Inches
+from PIL import Image
 from tkinter import messagebox
+from utils import config
+from utils.annotations import render_annotations
+from utils.docx_stream import StreamingDocxWriter, cleanup_staging
+from utils.image_utils import budget_settings, prepare_for_embed
+from utils.metrics import tracer
 from utils.path_utils import get_base_path
 
+# 已预处理插图缓存条数（相同图片与标注再次插入时直接复用）
+PICTURE_CACHE_SIZE = 16
+PICTURE_TAG = re.compile(rb"<pic:pic[ >]")
+
+
+def count_pictures(doc_path):
+    """
+    统计 Word 文档正文中的图片数（直接读取 document.xml，不解析整个文档），文档不存在返回 0
+    """
+    if not os.path.exists(doc_path):
+        return 0
+    try:
+        with zipfile.ZipFile(doc_path) as archive:
+            return len(PICTURE_TAG.findall(archive.read("word/document.xml")))
+    except (KeyError, OSError, zipfile.BadZipFile):
+        return 0
+
+
 class WordGenerator:
-    def __init__(self, logger, root):
+    def __init__(self, logger, root, max_docs=None, max_bytes=None, embed_dpi=None, quantize=None,
+                 size_budget=None, embed_original=None, output_dir=None, writer=None, staging_dir=None,
+                 on_saved=None):
         self.logger = logger
         self.root = root
-        base_dir = get_base_path()
-        self.output_dir = os.path.join(base_dir, "word_output")
+        # 文档保存成功后回调 on_saved(行号列表)，传入随图片插入的 Excel 行（如标记为已执行）；
+        # 截图只在内存缓存或暂存区中时不回调，异常退出不会留下有状态却没有截图的行
+        self.on_saved = on_saved
+        self.output_dir = output_dir or os.path.join(get_base_path(), "word_output")
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def add_image_to_word(self, case_name, checkpoint, image_path, step_note=""):
+        # 会话级文档缓存：用例名 -> {"doc", "path", "bytes", "pictures", "dirty", "rows"}，按最近使用排序
+        self.max_docs = max_docs if max_docs is not None else config.WORD_CACHE_MAX_DOCS
+        self.max_bytes = max_bytes if max_bytes is not None else config.WORD_CACHE_MAX_BYTES
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # 写入方式：stream 为追加式写入，document 为 python-docx 整体加载保存
+        self.writer = writer or config.WORD_WRITER
+        self.staging_dir = staging_dir or os.path.join(get_base_path(), config.WORD_STAGING_DIR)
+        if self.writer == "stream":
+            # 异常退出遗留的暂存目录（其他进程正在使用的不受影响）
+            cleanup_staging(self.staging_dir, self.logger)
+
+        # 插图预处理：按显示宽度重采样，可选调色板量化和报告体积预算
+        self.embed_width = config.EMBED_WIDTH_INCHES
+        self.embed_dpi = embed_dpi if embed_dpi is not None else config.EMBED_DPI
+        self.quantize = quantize if quantize is not None else config.EMBED_QUANTIZE
+        self.size_budget = size_budget if size_budget is not None else config.REPORT_SIZE_BUDGET
+        self.embed_original = embed_original if embed_original is not None else config.EMBED_ORIGINAL
+        self._pictures = OrderedDict()
+
+    @tracer.timed("word_add")
+    def add_image_to_word(self, case_name, checkpoint, image, step_note="", annotations=None, image_key=None,
+                          row=None):
         """
         新建或追加Word文档，插入用例名、验证点、（可选）步骤说明和图片
+        image 可以是图片路径或内存中的 PIL 图片；annotations 为标注记录，在此处绘制到图片上；
+        image_key 标识内存图片（如感知哈希），相同图片与标注再次插入时复用已预处理的数据；
+        row 为对应的 Excel 行，文档保存后通过 on_saved 回调；
+        返回插入后文档中的图片数，失败返回 None
         """
+        with self._lock:
+            entry = self._get_document(case_name, checkpoint)
+            if entry is None:
+                return None
+            doc = entry["doc"]
 
-        doc_path = os.path.join(self.output_dir, f"{case_name}.docx")
+            if step_note:
+                doc.add_paragraph(step_note)
+
+            # 插入图片，自动适应宽度
+            try:
+                picture, reused = self._prepare_picture(entry, image, annotations, image_key)
+                doc.add_picture(picture, width=Inches(self.embed_width))
+                doc.add_paragraph()  # 空行
+                if not reused:
+                    # 相同图片数据在文档中只保存一份
+                    entry["bytes"] += picture.getbuffer().nbytes
+                entry["pictures"] += 1
+                entry["dirty"] = True
+                if row is not None:
+                    entry["rows"].append(row)
+                self.logger.debug(f"插入截图到Word缓存：{entry['path']}")
+            except Exception as e:
+                self._show_error(f"写入Word文件失败：{e}")
+                return None
+            position = entry["pictures"]
+            self._evict()
+            return position
+
+    def _prepare_picture(self, entry, image, annotations=None, image_key=None):
+        """
+        返回 (图片流, 是否复用)：图片路径或 image_key 与标注、预处理参数都相同时复用上次的结果
+        """
+        settings = None if self.embed_original else budget_settings(entry["bytes"], self.size_budget,
+                                                                     self.embed_dpi, self.quantize)
+        if image_key is None and isinstance(image, str):
+            image_key = os.path.abspath(image)
+        key = None
+        if image_key is not None:
+            key = (image_key, json.dumps(annotations or [], sort_keys=True), settings)
+            data = self._pictures.get(key)
+            if data is not None:
+                self._pictures.move_to_end(key)
+                self.logger.log(f"复用已预处理的插图：{os.path.basename(str(image_key))}")
+                return io.BytesIO(data), True
+
+        picture = self._render_picture(image, annotations, settings)
+        if key is not None:
+            self._pictures[key] = picture.getvalue()
+            while len(self._pictures) > PICTURE_CACHE_SIZE:
+                self._pictures.popitem(last=False)
+        return picture, False
+
+    def _render_picture(self, image, annotations, settings):
+        """
+        按配置生成待插入的图片流：先绘制标注，再默认重采样到显示尺寸；
+        保留原图模式下无标注的文件直接读取，其余按原分辨率编码为 PNG
+        """
+        start = time.perf_counter()
+        name = os.path.basename(image) if isinstance(image, str) else "内存截图"
+        if annotations:
+            if isinstance(image, str):
+                with Image.open(image) as src:
+                    src.load()
+                    image = src.copy()
+            image = render_annotations(image, annotations)
+        if self.embed_original:
+            if isinstance(image, str) and os.path.splitext(image)[1].lower() != ".webp":
+                with open(image, "rb") as f:
+                    return io.BytesIO(f.read())
+            # Word 不支持 WebP
+            return prepare_for_embed(image, None, self.embed_dpi)
 
+        dpi, quantize, fmt = settings
+        picture = prepare_for_embed(image, self.embed_width, dpi, quantize, fmt)
+        self.logger.log(f"插图预处理：{name} -> {dpi} DPI {fmt}"
+                        f"{'（量化）' if quantize else ''}，{picture.getbuffer().nbytes / 1024:.0f} KB，"
+                        f"耗时 {(time.perf_counter() - start) * 1000:.0f} ms")
+        return picture
+
+    def _get_document(self, case_name, checkpoint):
+        entry = self._cache.get(case_name)
+        if entry is not None:
+            self._cache.move_to_end(case_name)
+            self.cache_hits += 1
+            self.logger.debug(f"Word缓存命中：{case_name}（命中 {self.cache_hits} / 未命中 {self.cache_misses}）")
+            return entry
+
+        self.cache_misses += 1
+        doc_path = os.path.join(self.output_dir, f"{case_name}.docx")
         if os.path.exists(doc_path):
             try:
-                doc = Document(doc_path)
+                doc = self._open_document(doc_path)
+                size = os.path.getsize(doc_path)
+                pictures = doc.pictures if isinstance(doc, StreamingDocxWriter) else count_pictures(doc_path)
                 self.logger.log(f"打开已有Word文件：{doc_path}")
             except Exception as e:
                 self._show_error(f"打开Word文件失败：{e}")
-                return
+                return None
         else:
             doc = Document()
             doc.add_heading(case_name, level=1)
             doc.add_paragraph(checkpoint)
+            if self.writer == "stream":
+                doc = self._stream_writer(doc)
+            size = 0
+            pictures = 0
+        self.logger.log(f"Word缓存未命中：{case_name}（命中 {self.cache_hits} / 未命中 {self.cache_misses}）")
+
+        entry = {"doc": doc, "path": doc_path, "bytes": size, "pictures": pictures, "dirty": False, "rows": []}
+        self._cache[case_name] = entry
+        return entry
+
+    def _open_document(self, doc_path):
+        if self.writer != "stream":
+            return Document(doc_path)
+        try:
+            return self._stream_writer(doc_path)
+        except (ValueError, OSError, zipfile.BadZipFile) as e:
+            self.logger.log(f"追加式写入不支持该文档，改为整体加载：{doc_path}：{e}", "WARNING")
+            return Document(doc_path)
+
+    def _stream_writer(self, source):
+        """
+        追加式写入：把已有文档（路径）或新建的 Document 暂存到磁盘，之后只追加新段落和图片
+        """
+        if not isinstance(source, str):
+            buffer = io.BytesIO()
+            source.save(buffer)
+            buffer.seek(0)
+            source = buffer
+        return StreamingDocxWriter(source, self.staging_dir)
 
-        if step_note:
-            doc.add_paragraph(step_note)
+    def _evict(self):
+        # 超出数量或字节上限时，保存并移除最近最少使用的文档（保留最新一个）；
+        # 追加式写入的文档不占用与图片相关的内存，只按数量淘汰
+        while len(self._cache) > 1 and (
+                len(self._cache) > self.max_docs
+                or sum(e["bytes"] for e in self._cache.values()
+                       if not isinstance(e["doc"], StreamingDocxWriter)) > self.max_bytes):
+            case_name, entry = self._cache.popitem(last=False)
+            self.logger.log(f"Word缓存淘汰：{case_name}")
+            if not self._release(case_name, entry):
+                # 保存失败的文档已放回缓存，下次再试
+                break
 
-        # 插入图片，自动适应宽度
+    @tracer.timed("word_save")
+    def _save(self, entry) -> bool:
+        if not entry["dirty"]:
+            return True
+        start = time.perf_counter()
         try:
-            doc.add_picture(image_path, width=Inches(5.5))
-            doc.add_paragraph()  # 空行
-            doc.save(doc_path)
-            self.logger.log(f"插入截图并保存Word：{doc_path}")
+            entry["doc"].save(entry["path"])
+            entry["dirty"] = False
+            self.logger.log(f"保存Word：{entry['path']}，耗时 {(time.perf_counter() - start) * 1000:.0f} ms")
+            return True
         except Exception as e:
             self._show_error(f"写入Word文件失败：{e}")
+            return False
+
+    def _release(self, case_name, entry):
+        # 保存并移出缓存，追加式写入同时删除暂存区；保存失败（如文档正被 Word 打开）时放回缓存并保留暂存区，
+        # 已追加的内容不会丢失，下次保存时重试
+        if not self._save(entry):
+            self._cache[case_name] = entry
+            return False
+        if isinstance(entry["doc"], StreamingDocxWriter):
+            entry["doc"].close()
+        if entry["rows"] and self.on_saved:
+            self.on_saved(entry["rows"])
+        return True
+
+    def flush(self, case_name):
+        """
+        保存并关闭指定用例的缓存文档（用例完成时调用）
+        """
+        with self._lock:
+            entry = self._cache.pop(case_name, None)
+            if entry is not None:
+                self._release(case_name, entry)
+
+    def flush_all(self):
+        """
+        保存并关闭全部缓存文档（退出时调用）
+        """
+        with self._lock:
+            if not self._cache:
+                return
+            start = time.perf_counter()
+            count = len(self._cache)
+            for case_name in list(self._cache):
+                self._release(case_name, self._cache.pop(case_name))
+            self.logger.log(f"Word缓存全部写出 {count - len(self._cache)} 个文档，"
+                            f"耗时 {(time.perf_counter() - start) * 1000:.0f} ms，命中 {self.cache_hits} / 未命中 {self.cache_misses}")
+            for case_name, entry in self._cache.items():
+                staging = f"，已追加内容暂存在 {entry['doc'].staging_dir}" \
+                    if isinstance(entry["doc"], StreamingDocxWriter) else ""
+                self.logger.log(f"Word文档未能保存：{entry['path']}{staging}", "ERROR")
 
     def _show_error(self, msg):
+        if self.root is None:
+            # 无界面模式：仅写日志
+            self.logger.log(msg, "ERROR")
+            return
         self.root.attributes('-topmost', True)
         messagebox.showerror("错误", msg, parent=self.root)
-        self.root.attributes('-topmost', False)
\ No newline at end of file
+        self.root.attributes('-topmost', False)
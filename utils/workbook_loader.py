@@ -0,0 +1,64 @@
+# utils/workbook_loader.py
+
+import pandas as pd
+from openpyxl import load_workbook
+
+RESULT_COLUMN = "测试结果"
+
+
+def _column_names(header):
+    """
+    与 pandas.read_excel 一致：空表头记为 Unnamed: i，重复表头追加 .1/.2 后缀
+    """
+    names, seen = [], {}
+    for i, value in enumerate(header):
+        name = f"Unnamed: {i}" if value is None or value == "" else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def load_sheet(file_path):
+    """
+    以只读模式流式读取活动工作表，单次遍历同时得到表头、“测试结果”列号和数据，
+    返回 (DataFrame, 测试结果列号(从1开始，未找到为None))
+    """
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = list(next(rows, ()))
+        result_col_index = header.index(RESULT_COLUMN) + 1 if RESULT_COLUMN in header else None
+
+        width = len(header)
+        columns = [[] for _ in range(width)]
+        blank_rows = 0  # 连续空行先计数，后面出现数据行时再补齐，末尾空行丢弃
+        for row in rows:
+            if all(value is None for value in row):
+                blank_rows += 1
+                continue
+            if len(row) > width:
+                # 数据超出表头宽度时补充无名列
+                filled = len(columns[0]) if columns else 0
+                columns.extend([None] * filled for _ in range(len(row) - width))
+                header.extend([None] * (len(row) - width))
+                width = len(row)
+            for _ in range(blank_rows):
+                for column in columns:
+                    column.append(None)
+            blank_rows = 0
+            for i in range(width):
+                columns[i].append(row[i] if i < len(row) else None)
+    finally:
+        wb.close()
+
+    # 全空列与 pandas.read_excel 保持一致，按浮点 NaN 处理
+    df = pd.DataFrame({
+        i: column if any(value is not None for value in column) else pd.Series([None] * len(column), dtype=float)
+        for i, column in enumerate(columns)
+    })
+    df.columns = _column_names(header)
+    return df, result_col_index
@@ -0,0 +1,273 @@
+# utils/xlsx_patcher.py
+
+import copy
+import os
+import posixpath
+import re
+import shutil
+import struct
+import zipfile
+from xml.sax.saxutils import escape
+
+CHUNK_SIZE = 1024 * 1024
+# 改写后的工作表压缩级别（越大越慢越小，其余成员直接复制压缩后的数据，不解压）
+COMPRESS_LEVEL = 6
+
+ROW_END = re.compile(rb"</row>|<row\b[^>]*/>")
+ROW_START = re.compile(rb"<row\b([^>]*?)(/?)>")
+SHEET_DATA_END = re.compile(rb"</sheetData>|<sheetData\b([^>]*?)/>")
+CELL = re.compile(rb"<c\b([^>]*?)(?:/>|>.*?</c>)", re.S)
+ATTR_R = re.compile(rb'\br="([A-Z]+)(\d+)"')
+ATTR_ROW_R = re.compile(rb'\br="(\d+)"')
+ATTR_S = re.compile(rb'\bs="(\d+)"')
+ACTIVE_TAB = re.compile(rb'<workbookView\b[^>]*\bactiveTab="(\d+)"')
+SHEET = re.compile(rb"<sheet\b[^>]*>")
+REL = re.compile(rb"<Relationship\b[^>]*>")
+
+
+class XlsxPatchError(Exception):
+    """
+    工作簿结构不在支持范围内（调用方应回退为 openpyxl 整体保存）
+    """
+
+
+def column_letter(index):
+    """
+    列号（从1开始）转为 Excel 列字母
+    """
+    letters = ""
+    while index:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def _column_index(letters):
+    index = 0
+    for char in letters:
+        index = index * 26 + char - 64
+    return index
+
+
+def _attr(tag, name):
+    match = re.search(rb'\b' + name + rb'="([^"]*)"', tag)
+    return match.group(1) if match else None
+
+
+def active_sheet_path(archive):
+    """
+    返回活动工作表在压缩包中的路径（与 openpyxl 的 wb.active 一致）
+    """
+    workbook = archive.read("xl/workbook.xml")
+    match = ACTIVE_TAB.search(workbook)
+    active = int(match.group(1)) if match else 0
+    sheets = SHEET.findall(workbook)
+    if active >= len(sheets):
+        raise XlsxPatchError("找不到活动工作表")
+    rel_id = _attr(sheets[active], rb"r:id")
+    for rel in REL.findall(archive.read("xl/_rels/workbook.xml.rels")):
+        if _attr(rel, rb"Id") == rel_id:
+            target = _attr(rel, rb"Target").decode("utf-8")
+            if target.startswith("/"):
+                return target.lstrip("/")
+            return posixpath.normpath(posixpath.join("xl", target))
+    raise XlsxPatchError("找不到活动工作表的关系")
+
+
+class _SheetPatcher:
+    """
+    逐行改写工作表 XML：目标行中的目标单元格替换为内联字符串并保留样式，缺失的单元格按列顺序插入，
+    缺失的目标行按行号顺序插入
+    """
+
+    def __init__(self, values):
+        # {行号: {列号: 文本}}
+        self.rows = {}
+        for (row, column), value in values.items():
+            self.rows.setdefault(row, {})[column] = value
+        self.patched = 0
+        self._row_number = 0
+        self._order = sorted(self.rows)
+        self._next = 0  # _order 中下一个待检查的目标行
+
+    @staticmethod
+    def _cell(ref, style, value):
+        style_attr = b' s="' + style + b'"' if style else b""
+        text = escape(value).encode("utf-8")
+        return b'<c r="' + ref + b'"' + style_attr + b' t="inlineStr"><is><t>' + text + b"</t></is></c>"
+
+    def _new_row(self, row_number):
+        targets = self.rows.pop(row_number)
+        row_ref = str(row_number).encode()
+        cells = b"".join(self._cell(column_letter(column).encode() + row_ref, None, value)
+                         for column, value in sorted(targets.items()))
+        self.patched += len(targets)
+        return b'<row r="' + row_ref + b'">' + cells + b"</row>"
+
+    def missing_rows(self, before=None):
+        """
+        返回工作表中不存在、行号小于 before（为 None 时为全部剩余）的目标行的 XML
+        """
+        output = []
+        while self._next < len(self._order) and (before is None or self._order[self._next] < before):
+            row_number = self._order[self._next]
+            self._next += 1
+            if row_number in self.rows:
+                output.append(self._new_row(row_number))
+        return b"".join(output)
+
+    def patch_row(self, segment):
+        """
+        segment 为完整的一行（自闭合 <row .../> 或 <row ...>...</row>，前面可能带其他内容）
+        """
+        start = ROW_START.search(segment)
+        if start is None:
+            return segment
+        match = ATTR_ROW_R.search(start.group(1))
+        self._row_number = int(match.group(1)) if match else self._row_number + 1
+        inserted = self.missing_rows(self._row_number)
+        if inserted:
+            segment = segment[:start.start()] + inserted + segment[start.start():]
+            start = ROW_START.search(segment, start.start() + len(inserted))
+        targets = self.rows.pop(self._row_number, None)
+        if not targets:
+            return segment
+
+        head, body = segment[:start.end()], segment[start.end():]
+        if start.group(2):
+            # 自闭合的空行
+            head = segment[:start.start()] + b"<row" + start.group(1) + b">"
+            body = b"</row>"
+        cells, position = [], 0
+        for cell in CELL.finditer(body):
+            ref = ATTR_R.search(cell.group(1))
+            if ref is None:
+                raise XlsxPatchError("单元格缺少 r 属性")
+            cells.append((_column_index(ref.group(1)), cell.group(0), cell.group(1)))
+            position = cell.end()
+        tail = body[position:]
+
+        row_ref = str(self._row_number).encode()
+        output = []
+        pending = sorted(targets.items())
+        for column, xml, attrs in cells:
+            while pending and pending[0][0] < column:
+                target_column, value = pending.pop(0)
+                output.append(self._cell(column_letter(target_column).encode() + row_ref, None, value))
+            if pending and pending[0][0] == column:
+                _, value = pending.pop(0)
+                style = ATTR_S.search(attrs)
+                output.append(self._cell(column_letter(column).encode() + row_ref,
+                                         style.group(1) if style else None, value))
+            else:
+                output.append(xml)
+        for target_column, value in pending:
+            output.append(self._cell(column_letter(target_column).encode() + row_ref, None, value))
+        self.patched += len(targets)
+        return head + b"".join(output) + tail
+
+
+def patch_cells(file_path, values):
+    """
+    原地修改活动工作表中的若干单元格 {(行号, 列号): 文本}（均从1开始）：只流式改写该工作表的 XML，
+    其余压缩包成员直接复制压缩数据；先写临时文件再替换原文件。结构不支持时抛出 XlsxPatchError，原文件不变
+    """
+    if not values:
+        return 0
+    tmp_path = f"{file_path}.patching"
+    patcher = _SheetPatcher(values)
+    try:
+        with zipfile.ZipFile(file_path) as source, \
+                zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED, compresslevel=COMPRESS_LEVEL) as target:
+            sheet_path = active_sheet_path(source)
+            for info in source.infolist():
+                if info.filename != sheet_path:
+                    _copy_raw(source, target, info)
+                    continue
+                with source.open(info) as src, target.open(_copy_info(info), "w") as dst:
+                    _patch_stream(src, dst, patcher)
+        if patcher.rows:
+            raise XlsxPatchError(f"工作表中缺少 {len(patcher.rows)} 个目标行")
+        shutil.copymode(file_path, tmp_path)
+        os.replace(tmp_path, file_path)
+    except zipfile.BadZipFile as e:
+        raise XlsxPatchError(f"不是有效的 xlsx 文件：{e}") from e
+    except KeyError as e:
+        raise XlsxPatchError(f"缺少工作簿成员：{e}") from e
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return patcher.patched
+
+
+def _copy_info(info):
+    copied = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+    copied.compress_type = info.compress_type
+    copied.external_attr = info.external_attr
+    copied.create_system = info.create_system
+    return copied
+
+
+def _copy_raw(source, target, info):
+    """
+    不解压直接复制成员的压缩数据（沿用原 ZipInfo 的 CRC、大小和压缩方式），耗时只与压缩后的大小相关
+    """
+    if info.flag_bits & 0x1:
+        raise XlsxPatchError(f"不支持加密的压缩包成员：{info.filename}")
+    source.fp.seek(info.header_offset)
+    header = source.fp.read(zipfile.sizeFileHeader)
+    if len(header) != zipfile.sizeFileHeader or header[:4] != zipfile.stringFileHeader:
+        raise XlsxPatchError(f"压缩包成员头损坏：{info.filename}")
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    source.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_length + extra_length)
+
+    copied = copy.copy(info)
+    copied.header_offset = target.fp.tell()
+    # CRC 和大小直接写在本地文件头中，不再使用数据描述符；原扩展字段（如 Zip64 大小）由 zipfile 按需重新生成
+    copied.flag_bits &= ~0x08
+    copied.extra = b""
+    target.fp.write(copied.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        chunk = source.fp.read(min(CHUNK_SIZE, remaining))
+        if not chunk:
+            raise XlsxPatchError(f"压缩包成员数据不完整：{info.filename}")
+        target.fp.write(chunk)
+        remaining -= len(chunk)
+    target.filelist.append(copied)
+    target.NameToInfo[copied.filename] = copied
+    target.start_dir = target.fp.tell()
+    target._didModify = True
+
+
+def _patch_stream(src, dst, patcher):
+    """
+    分块读取工作表 XML，以行为单位改写后写出，内存占用与单行大小相关而与工作表大小无关
+    """
+    buffer = b""
+    seen_sheet_data = False
+    while True:
+        chunk = src.read(CHUNK_SIZE)
+        buffer += chunk
+        if not seen_sheet_data:
+            if b"<sheetData" in buffer:
+                seen_sheet_data = True
+            elif b":sheetData" in buffer:
+                raise XlsxPatchError("不支持带命名空间前缀的工作表")
+        position = 0
+        for end in ROW_END.finditer(buffer):
+            dst.write(patcher.patch_row(buffer[position:end.end()]))
+            position = end.end()
+        buffer = buffer[position:]
+        if not chunk:
+            break
+    if not seen_sheet_data:
+        raise XlsxPatchError("工作表中没有 sheetData")
+    # 行号大于现有各行的目标行追加在 sheetData 末尾（空工作表的 <sheetData/> 展开为成对标签）
+    end = SHEET_DATA_END.search(buffer)
+    inserted = patcher.missing_rows()
+    if end is not None and inserted:
+        closing = b"</sheetData>"
+        opening = b"<sheetData" + end.group(1) + b">" if end.group(0).endswith(b"/>") else b""
+        buffer = buffer[:end.start()] + opening + inserted + closing + buffer[end.end():]
+    dst.write(buffer)